@@ -0,0 +1,36 @@
+"""add download count snapshots
+
+Revision ID: 14d8caa26146
+Revises: 304c69a8f0d9
+Create Date: 2026-10-17 05:49:03.113318
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "14d8caa26146"
+down_revision = "304c69a8f0d9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "download_count_snapshots",
+        sa.Column("snapshot_id", sa.String(length=64), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("download_count_snapshots_pkey")),
+        sa.UniqueConstraint("id", name=op.f("download_count_snapshots_id_key")),
+        sa.UniqueConstraint(
+            "snapshot_id", name=op.f("download_count_snapshots_snapshot_id_key")
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("download_count_snapshots")
@@ -0,0 +1,51 @@
+"""add file blobs
+
+Revision ID: 3d38acc9a9ab
+Revises: 9b1dfae114de
+Create Date: 2026-10-17 10:12:31.502117
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3d38acc9a9ab"
+down_revision = "9b1dfae114de"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "file_blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("s3_key", sa.String(length=255), nullable=False),
+        sa.Column("file_size", sa.BigInteger(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("file_blobs_pkey")),
+        sa.UniqueConstraint("id", name=op.f("file_blobs_id_key")),
+        sa.UniqueConstraint("s3_key", name=op.f("file_blobs_s3_key_key")),
+        sa.UniqueConstraint("sha256", name=op.f("file_blobs_sha256_key")),
+    )
+    op.add_column("files", sa.Column("blob_id", sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        op.f("files_blob_id_fkey"), "files", "file_blobs", ["blob_id"], ["id"]
+    )
+    op.create_index(op.f("files_blob_id_idx"), "files", ["blob_id"], unique=False)
+    # Deduplicated files share the s3_key of their blob
+    op.drop_constraint(op.f("files_s3_key_key"), "files", type_="unique")
+    op.create_index(op.f("files_s3_key_idx"), "files", ["s3_key"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("files_s3_key_idx"), table_name="files")
+    op.create_unique_constraint(op.f("files_s3_key_key"), "files", ["s3_key"])
+    op.drop_index(op.f("files_blob_id_idx"), table_name="files")
+    op.drop_constraint(op.f("files_blob_id_fkey"), "files", type_="foreignkey")
+    op.drop_column("files", "blob_id")
+    op.drop_table("file_blobs")
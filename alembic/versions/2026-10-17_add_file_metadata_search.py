@@ -0,0 +1,59 @@
+"""add file metadata search
+
+Revision ID: c994443f2581
+Revises: d7538097b016
+Create Date: 2026-10-17 19:58:48.211407
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c994443f2581"
+down_revision = "d7538097b016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("file_metadata", sa.Column("content_text", sa.Text(), nullable=True))
+    # Stored generated column: adding it rewrites file_metadata once
+    op.add_column(
+        "file_metadata",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A')"
+                " || setweight(to_tsvector('english', "
+                "coalesce(content_text, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "file_metadata_search_vector_idx",
+            "file_metadata",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "file_metadata_search_vector_idx",
+            table_name="file_metadata",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("file_metadata", "search_vector")
+    op.drop_column("file_metadata", "content_text")
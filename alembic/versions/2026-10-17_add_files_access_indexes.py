@@ -0,0 +1,67 @@
+"""add files access indexes
+
+Revision ID: d7538097b016
+Revises: 343d663105a9
+Create Date: 2026-10-17 18:42:10.384215
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d7538097b016"
+down_revision = "343d663105a9"
+branch_labels = None
+depends_on = None
+
+LIVE_FILES = sa.text("deleted_at IS NULL")
+LIVE_PUBLIC_FILES = sa.text("visibility = 'PUBLIC' AND deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction; the builds don't block writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "files_owner_id_created_at_idx",
+            "files",
+            ["owner_id", "created_at", "id"],
+            unique=False,
+            postgresql_where=LIVE_FILES,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "files_department_id_created_at_idx",
+            "files",
+            ["department_id", "created_at", "id"],
+            unique=False,
+            postgresql_where=LIVE_FILES,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "files_public_created_at_idx",
+            "files",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_where=LIVE_PUBLIC_FILES,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name in (
+            "files_public_created_at_idx",
+            "files_department_id_created_at_idx",
+            "files_owner_id_created_at_idx",
+        ):
+            op.drop_index(
+                index_name,
+                table_name="files",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,37 @@
+"""add files deleted_at
+
+Revision ID: 921f2c9c5329
+Revises: 3d38acc9a9ab
+Create Date: 2026-10-17 14:40:08.318764
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "921f2c9c5329"
+down_revision = "3d38acc9a9ab"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("files", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "files_deleted_at_idx",
+        "files",
+        ["deleted_at"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "files_deleted_at_idx",
+        table_name="files",
+        postgresql_where=sa.text("deleted_at IS NOT NULL"),
+    )
+    op.drop_column("files", "deleted_at")
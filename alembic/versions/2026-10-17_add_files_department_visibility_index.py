@@ -0,0 +1,43 @@
+"""add files department visibility index
+
+Revision ID: bc226e1e3a24
+Revises: 14d8caa26146
+Create Date: 2026-10-17 06:08:42.438844
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "bc226e1e3a24"
+down_revision = "14d8caa26146"
+branch_labels = None
+depends_on = None
+
+LIVE_DEPARTMENT_FILES = sa.text("visibility = 'DEPARTMENT' AND deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction; the build doesn't block writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "files_department_visibility_created_at_idx",
+            "files",
+            ["department_id", "created_at", "id"],
+            unique=False,
+            postgresql_where=LIVE_DEPARTMENT_FILES,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "files_department_visibility_created_at_idx",
+            table_name="files",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,25 @@
+"""add files etag
+
+Revision ID: 304c69a8f0d9
+Revises: 162c11a6f496
+Create Date: 2026-10-17 22:16:40.528913
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "304c69a8f0d9"
+down_revision = "162c11a6f496"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("files", sa.Column("etag", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("files", "etag")
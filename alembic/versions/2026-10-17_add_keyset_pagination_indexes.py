@@ -0,0 +1,29 @@
+"""add keyset pagination indexes
+
+Revision ID: 343d663105a9
+Revises: 921f2c9c5329
+Create Date: 2026-10-17 16:05:44.129380
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "343d663105a9"
+down_revision = "921f2c9c5329"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "files_created_at_id_idx", "files", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "users_created_at_id_idx", "users", ["created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("users_created_at_id_idx", table_name="users")
+    op.drop_index("files_created_at_id_idx", table_name="files")
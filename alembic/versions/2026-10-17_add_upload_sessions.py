@@ -0,0 +1,75 @@
+"""add upload sessions
+
+Revision ID: 162c11a6f496
+Revises: c994443f2581
+Create Date: 2026-10-17 21:04:17.386120
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "162c11a6f496"
+down_revision = "c994443f2581"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_sessions",
+        sa.Column("owner_id", sa.UUID(), nullable=False),
+        sa.Column("department_id", sa.UUID(), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column(
+            "file_type",
+            postgresql.ENUM("PDF", "DOC", "DOCX", name="filetype", create_type=False),
+            nullable=False,
+        ),
+        sa.Column(
+            "visibility",
+            postgresql.ENUM(
+                "PRIVATE", "DEPARTMENT", "PUBLIC", name="visibility", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("file_size", sa.BigInteger(), nullable=False),
+        sa.Column("part_size", sa.Integer(), nullable=False),
+        sa.Column("s3_key", sa.String(length=255), nullable=False),
+        sa.Column("upload_id", sa.String(length=1024), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("file_id", sa.UUID(), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["department_id"],
+            ["departments.id"],
+            name=op.f("upload_sessions_department_id_fkey"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["file_id"],
+            ["files.id"],
+            name=op.f("upload_sessions_file_id_fkey"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["owner_id"], ["users.id"], name=op.f("upload_sessions_owner_id_fkey")
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("upload_sessions_pkey")),
+        sa.UniqueConstraint("id", name=op.f("upload_sessions_id_key")),
+    )
+    op.create_index(
+        op.f("upload_sessions_expires_at_idx"),
+        "upload_sessions",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("upload_sessions_expires_at_idx"), table_name="upload_sessions")
+    op.drop_table("upload_sessions")
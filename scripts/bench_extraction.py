@@ -0,0 +1,137 @@
+"""
+Compare metadata extraction throughput of the legacy task body with the
+extraction queue drain on the persistent worker event loop.
+
+legacy: one run_until_complete each for the download and the save, an S3
+client per download, one file at a time (a prefork child).
+drain: the jobs are queued in Redis and drained as the extract_pending_metadata
+task does, EXTRACTION_BATCH_SIZE files per upsert and up to
+METADATA_EXTRACTION_CONCURRENCY in flight.
+
+Usage: poetry run python scripts/bench_extraction.py [file_count]
+Requires a seeded database (scripts/seed.py), the S3 settings from .env and
+an empty extraction queue, since the drain takes every queued job.
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from PyPDF2 import PdfWriter
+from sqlalchemy import delete, select
+
+from src.database import engine, execute, fetch_one
+from src.files.constants import FileType, Visibility
+from src.files.extraction import drain_extraction_queue, queue_extractions
+from src.files.metadata import parse_metadata, save_metadata
+from src.files.models import File, FileMetadata
+from src.files.s3 import delete_many_from_s3, download_from_s3, upload_to_s3
+from src.redis import close_redis
+from src.users.models import User
+from src.worker import run_on_worker_loop, stop_worker_loop
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger("src").setLevel(logging.WARNING)
+
+BENCH_PREFIX = "bench/extraction"
+
+
+def make_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(612, 792)
+    writer.add_metadata({"/Title": "Benchmark", "/Author": "bench"})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+async def create_files(count: int) -> list[tuple[str, str, str]]:
+    """Upload `count` PDFs and create their file rows; returns extraction jobs."""
+    admin = await fetch_one(select(User).where(User.username == "admin"))
+    content = make_pdf(50)
+    jobs = []
+    for i in range(count):
+        file_id, s3_key = uuid.uuid4(), f"{BENCH_PREFIX}/{i}.pdf"
+        await upload_to_s3(content, s3_key)
+        await execute(
+            File.__table__.insert().values(
+                id=file_id,
+                owner_id=admin["id"],
+                department_id=admin["department_id"],
+                filename=f"bench-{i}.pdf",
+                file_type=FileType.PDF,
+                visibility=Visibility.PRIVATE,
+                file_size=len(content),
+                s3_key=s3_key,
+            ),
+            commit_after=True,
+        )
+        jobs.append((str(file_id), s3_key, FileType.PDF.value))
+    return jobs
+
+
+async def clear_metadata(jobs: list[tuple[str, str, str]]) -> None:
+    file_ids = [uuid.UUID(file_id) for file_id, _, _ in jobs]
+    await execute(
+        delete(FileMetadata).where(FileMetadata.file_id.in_(file_ids)),
+        commit_after=True,
+    )
+
+
+async def remove_files(jobs: list[tuple[str, str, str]]) -> None:
+    await clear_metadata(jobs)
+    await execute(
+        delete(File).where(File.id.in_([uuid.UUID(job[0]) for job in jobs])),
+        commit_after=True,
+    )
+    await delete_many_from_s3([s3_key for _, s3_key, _ in jobs])
+
+
+def extract_legacy(loop: asyncio.AbstractEventLoop, job: tuple[str, str, str]):
+    file_id, s3_key, file_type = job
+    file_content = loop.run_until_complete(download_from_s3(s3_key))
+    metadata = parse_metadata(file_type, file_content)
+    loop.run_until_complete(save_metadata(file_id, metadata))
+
+
+def report(label: str, count: int, elapsed: float) -> None:
+    logger.info(
+        f"{label:<22} {count} files in {elapsed:6.2f} s  {count / elapsed:7.1f} files/s"
+    )
+
+
+def main(count: int) -> None:
+    loop = asyncio.new_event_loop()
+    jobs = loop.run_until_complete(create_files(count))
+    try:
+        started = time.perf_counter()
+        for job in jobs:
+            extract_legacy(loop, job)
+        report("legacy", count, time.perf_counter() - started)
+        loop.run_until_complete(clear_metadata(jobs))
+        # The worker loop opens its own pool connections
+        loop.run_until_complete(engine.dispose())
+        loop.run_until_complete(close_redis())
+        loop.close()
+
+        run_on_worker_loop(queue_extractions(jobs))
+        started = time.perf_counter()
+        saved = run_on_worker_loop(drain_extraction_queue())
+        report("drain", saved, time.perf_counter() - started)
+    finally:
+        run_on_worker_loop(remove_files(jobs))
+        stop_worker_loop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
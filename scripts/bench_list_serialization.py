@@ -0,0 +1,138 @@
+"""
+Compare the serialization cost of a file listing page per row count.
+
+old: FileResponse models validated from the rows, then serialized through
+the Page[FileResponse] response model and rendered by JSONResponse, as
+list_files_endpoint used to do.
+new: build_file_page_content rendered by ORJSONResponse.
+
+Both paths must produce the same bytes; the script checks that first.
+
+Usage: poetry run python scripts/bench_list_serialization.py [rows] [rounds]
+Needs no database: the rows are built in memory like list_files returns them.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi._compat import ModelField
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from pydantic.fields import FieldInfo
+
+from src.files.constants import FileType, Visibility
+from src.files.schemas import FileResponse
+from src.files.utils import build_file_page_content
+from src.schemas import Page
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESPONSE_FIELD = ModelField(
+    field_info=FieldInfo(annotation=Page[FileResponse]),
+    name="Response_list_files_endpoint",
+    mode="serialization",
+)
+
+
+def make_page(count: int) -> dict:
+    owner_id, department_id = uuid.uuid4(), uuid.uuid4()
+    created_at = datetime(2024, 6, 1, 12, 30, 15, 123456)
+    items = []
+    for i in range(count):
+        file_id = uuid.uuid4()
+        timestamp = created_at + timedelta(seconds=i)
+        items.append(
+            {
+                "id": file_id,
+                "owner_id": owner_id,
+                "department_id": department_id,
+                "filename": f"quarterly report №{i}.pdf",
+                "file_type": FileType.PDF,
+                "visibility": Visibility.DEPARTMENT,
+                "file_size": 1_048_576 + i,
+                "s3_key": f"files/{department_id}/{file_id}.pdf",
+                "etag": "d41d8cd98f00b204e9800998ecf8427e",
+                "blob_id": None,
+                "download_count": i % 17,
+                "deleted_at": None,
+                "created_at": timestamp,
+                "updated_at": timestamp,
+                "file_metadata": {
+                    "id": uuid.uuid4(),
+                    "file_id": file_id,
+                    "page_count": 12,
+                    "paragraph_count": None,
+                    "table_count": None,
+                    "title": "Quarterly report",
+                    "author": "Finance",
+                    "creation_date": "D:20240601123015",
+                    "creator": "Writer",
+                    "created_at": timestamp,
+                    "updated_at": timestamp,
+                }
+                if i % 4
+                else {},
+            }
+        )
+    return {"items": items, "next_cursor": "MjAyNC0wNi0wMVQxMjozMDoxNQ"}
+
+
+async def render_old(page: dict) -> bytes:
+    content = Page[FileResponse](
+        items=[FileResponse(**f) for f in page["items"]],
+        next_cursor=page["next_cursor"],
+    )
+    value = await serialize_response(
+        field=RESPONSE_FIELD, response_content=content, is_coroutine=True
+    )
+    return JSONResponse(value).body
+
+
+async def render_new(page: dict) -> bytes:
+    return ORJSONResponse(build_file_page_content(page)).body
+
+
+async def measure(render, page: dict, rounds: int) -> float:
+    """Best time of `rounds` renders, in seconds."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await render(page)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def main(count: int, rounds: int) -> None:
+    page = make_page(count)
+    old_body, new_body = await render_old(page), await render_new(page)
+    if old_body != new_body:
+        raise SystemExit("The responses differ; the fast path changed the wire format")
+    logger.info(f"{count} rows, {len(new_body) / 1024:.0f} KiB, identical bytes")
+
+    old = await measure(render_old, page, rounds)
+    new = await measure(render_new, page, rounds)
+    for label, elapsed in (("old", old), ("new", new)):
+        logger.info(
+            f"{label:<4} {elapsed * 1000:8.1f} ms  "
+            f"{elapsed * 1_000_000 / count:6.2f} us/row"
+        )
+    logger.info(f"speedup {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+        )
+    )
@@ -0,0 +1,124 @@
+"""
+Measure GET /files latency and event-loop lag while a login storm runs.
+
+Requests go through the app in-process, on this script's event loop, so any
+bcrypt call made on the loop shows up directly as probe latency. Pass
+--inline to verify passwords on the event loop, as before the thread pool.
+
+Usage: poetry run python scripts/bench_login_storm.py [--logins 40] [--inline]
+Requires a seeded database (scripts/seed.py) and the settings from .env.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from src.auth import service as auth_service
+from src.auth.utils import verify_password
+from src.main import app
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# Per-request logs would dominate the output and the timings
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("src").setLevel(logging.WARNING)
+
+CREDENTIALS = {"username": "admin", "password": "admin123456"}
+PROBE_CONCURRENCY = 4
+
+
+async def probe(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event):
+    """Request the file listing in a loop; returns latencies in milliseconds."""
+    timings = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/v1/files/?limit=10", headers=headers)
+        response.raise_for_status()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.01) -> list[float]:
+    """How late a periodic timer fires, in milliseconds."""
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+    return lags
+
+
+async def login(client: httpx.AsyncClient) -> int:
+    response = await client.post("/api/v1/auth/login", json=CREDENTIALS)
+    return response.status_code
+
+
+async def run_phase(
+    client: httpx.AsyncClient, headers: dict, logins: int, duration: float
+) -> tuple[list[float], list[float], Counter]:
+    stop = asyncio.Event()
+    probes = [
+        asyncio.create_task(probe(client, headers, stop))
+        for _ in range(PROBE_CONCURRENCY)
+    ]
+    lag = asyncio.create_task(loop_lag(stop))
+    started = time.perf_counter()
+    statuses = Counter(await asyncio.gather(*(login(client) for _ in range(logins))))
+    await asyncio.sleep(max(0.0, duration - (time.perf_counter() - started)))
+    stop.set()
+    timings = [timing for result in await asyncio.gather(*probes) for timing in result]
+    return timings, await lag, statuses
+
+
+def report(label: str, timings: list[float], lags: list[float]) -> None:
+    timings, lags = sorted(timings), sorted(lags)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    logger.info(
+        f"{label:<12} {len(timings):5} requests  "
+        f"p50 {statistics.median(timings):7.2f} ms  p99 {p99:7.2f} ms  "
+        f"max loop lag {lags[-1]:7.2f} ms"
+    )
+
+
+async def main(logins: int, duration: float, inline: bool) -> None:
+    if inline:
+
+        async def verify_on_loop(plain_password: str, hashed_password: str) -> bool:
+            return verify_password(plain_password, hashed_password)
+
+        auth_service.verify_password_async = verify_on_loop
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        response = await client.post("/api/v1/auth/login", json=CREDENTIALS)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        timings, lags, _ = await run_phase(client, headers, 0, duration)
+        report("baseline", timings, lags)
+
+        timings, lags, statuses = await run_phase(client, headers, logins, duration)
+        report(f"{logins} logins", timings, lags)
+        logger.info(f"Login responses: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--inline", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.duration, args.inline))
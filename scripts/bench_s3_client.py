@@ -0,0 +1,75 @@
+"""
+Compare the per-call overhead of a fresh S3 client against the shared client.
+
+Usage: poetry run python scripts/bench_s3_client.py [iterations]
+Requires the S3 settings from .env to point at a reachable bucket.
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.files import s3
+from src.files.s3 import (
+    close_s3_client,
+    delete_from_s3,
+    head_s3_object,
+    open_s3_client,
+    upload_to_s3,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BENCH_KEY = "bench/s3-client.bin"
+
+
+async def measure(iterations: int) -> list[float]:
+    """Time `iterations` sequential HEAD requests in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await head_s3_object(BENCH_KEY)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    logger.info(
+        f"{label:<18} mean {statistics.mean(timings):7.2f} ms  "
+        f"p50 {statistics.median(timings):7.2f} ms  p99 {p99:7.2f} ms"
+    )
+
+
+async def main(iterations: int) -> None:
+    logger.info(
+        f"Benchmarking {iterations} HEAD requests against "
+        f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_S3_BUCKET_NAME}"
+    )
+    await upload_to_s3(b"x" * 1024, BENCH_KEY)
+    try:
+        assert s3._shared_client is None
+        report("client per call", await measure(iterations))
+
+        await open_s3_client()
+        try:
+            await measure(5)  # warm up the connection pool
+            report("shared client", await measure(iterations))
+        finally:
+            await close_s3_client()
+    finally:
+        await delete_from_s3(BENCH_KEY)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,250 @@
+"""
+Check that the files queries use indexes instead of sequential scans at scale.
+
+Seeds synthetic departments, users and files inside a transaction, runs
+ANALYZE, then EXPLAINs the queries the service builds and exits with status 1
+if any of them scans files, file_metadata or file_blobs sequentially.
+The transaction is rolled back, so the seeded rows never become visible.
+
+Usage: poetry run python scripts/check_query_plans.py [file_count]
+Run it against a local database migrated to head, never against production.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import Select, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.database import engine
+from src.files.models import File, FileBlob
+from src.files.service import (
+    build_downloadable_files_query,
+    build_search_query,
+    filter_accessible_files,
+    select_files_with_metadata,
+    select_live_file,
+)
+from src.pagination import encode_cursor, paginate
+from src.users.constants import Role
+from src.users.models import User  # noqa: F401  (resolves File.owner)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHECKED_TABLES = {"files", "file_metadata", "file_blobs"}
+DEPARTMENT_COUNT = 20
+USER_COUNT = 2000
+PAGE_SIZE = 50
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO departments (id, name, created_at, updated_at)
+    SELECT gen_random_uuid(), 'plan-check-' || i, now(), now()
+    FROM generate_series(1, :departments) AS i
+    """,
+    """
+    WITH department AS (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+        FROM departments WHERE name LIKE 'plan-check-%'
+    )
+    INSERT INTO users (
+        id, username, email, hashed_password, role, department_id, is_active,
+        created_at, updated_at
+    )
+    SELECT gen_random_uuid(), 'plan-check-' || i, 'plan-check-' || i || '@example.com',
+           'x', 'USER', department.id, true, now(), now()
+    FROM generate_series(1, :users) AS i
+    JOIN department ON department.n = i % :departments
+    """,
+    """
+    WITH owner AS (
+        SELECT id, department_id, row_number() OVER (ORDER BY id) - 1 AS n
+        FROM users WHERE username LIKE 'plan-check-%'
+    )
+    INSERT INTO files (
+        id, owner_id, department_id, filename, file_type, visibility, file_size,
+        s3_key, download_count, deleted_at, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), owner.id, owner.department_id, 'file-' || i || '.pdf',
+           'PDF',
+           CASE WHEN i % 10 = 0 THEN 'PUBLIC'
+                WHEN i % 10 < 4 THEN 'DEPARTMENT'
+                ELSE 'PRIVATE' END::visibility,
+           1024, 'plan-check/' || i, 0,
+           CASE WHEN i % 100 = 0 THEN now() END,
+           now() - i * interval '1 second', now()
+    FROM generate_series(1, :files) AS i
+    JOIN owner ON owner.n = i % :users
+    """,
+    """
+    INSERT INTO file_metadata (
+        id, file_id, page_count, title, content_text, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), id, 1, filename,
+           CASE WHEN right(s3_key, 3) = '500' THEN 'quarterly revenue summary'
+                ELSE 'routine meeting notes' END,
+           now(), now()
+    FROM files WHERE s3_key LIKE 'plan-check/%' AND right(s3_key, 1) <> '7'
+    """,
+    """
+    INSERT INTO file_blobs (
+        id, sha256, s3_key, file_size, ref_count, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), encode(sha256(i::text::bytea), 'hex'),
+           'plan-check-blobs/' || i, 1024, 1, now(), now()
+    FROM generate_series(1, :files / 2) AS i
+    """,
+]
+
+
+async def seed(connection: AsyncConnection, file_count: int) -> None:
+    params = {
+        "departments": DEPARTMENT_COUNT,
+        "users": USER_COUNT,
+        "files": file_count,
+    }
+    for statement in SEED_STATEMENTS:
+        await connection.execute(text(statement), params)
+    for table in ("departments", "users", "files", "file_metadata", "file_blobs"):
+        await connection.execute(text(f"ANALYZE {table}"))
+
+
+async def pick_sample(connection: AsyncConnection) -> dict:
+    """Pick a seeded file and its owner to parametrize the queries."""
+    row = (
+        await connection.execute(
+            select(File.id, File.owner_id, File.department_id, File.created_at).where(
+                File.s3_key == "plan-check/500"
+            )
+        )
+    ).one()
+    return row._asdict()
+
+
+def build_queries(sample: dict) -> dict[str, Select]:
+    """The queries of the files service, as the service builds them."""
+    department_id = sample["department_id"]
+    users = {
+        role: {
+            "id": sample["owner_id"],
+            "role": role.value,
+            "department_id": str(department_id),
+        }
+        for role in Role
+    }
+    cursor = encode_cursor(sample["created_at"], sample["id"])
+
+    def listing(role: Role, **kwargs) -> Select:
+        query = filter_accessible_files(
+            select_files_with_metadata(), users[role], kwargs.get("department_id")
+        )
+        return paginate(
+            query, File.created_at, File.id, kwargs.get("cursor"), PAGE_SIZE
+        )
+
+    queries = {}
+    for role in Role:
+        queries[f"list_files {role.value}"] = listing(role)
+        queries[f"list_files {role.value} next page"] = listing(role, cursor=cursor)
+        queries[f"list_files {role.value} by department"] = listing(
+            role, department_id=department_id
+        )
+    for role in Role:
+        queries[f"search_files {role.value}"] = build_search_query(
+            "quarterly revenue", None, users[role]
+        )
+    # Both load the file through load_file, then check access in Python
+    queries["get_file / download_file"] = select_live_file(sample["id"])
+    for role in Role:
+        queries[f"download_files_zip {role.value} by id"] = (
+            build_downloadable_files_query(
+                [sample["id"], uuid.uuid4()], None, users[role]
+            )
+        )
+        queries[f"download_files_zip {role.value} by department"] = (
+            build_downloadable_files_query(None, department_id, users[role])
+        )
+    queries["delete_files USER"] = (
+        update(File)
+        .where(
+            File.id.in_([sample["id"], uuid.uuid4()]),
+            File.deleted_at.is_(None),
+            File.owner_id == sample["owner_id"],
+        )
+        .values(deleted_at=datetime.utcnow())
+    )
+    queries["purge_batch"] = (
+        select(File.id, File.s3_key, File.blob_id)
+        .where(File.deleted_at.isnot(None))
+        .limit(1000)
+        .with_for_update(skip_locked=True)
+    )
+    queries["blob lookup"] = select(FileBlob.id).where(FileBlob.sha256.in_(["0" * 64]))
+    return queries
+
+
+def walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def find_seq_scans(plan: dict) -> list[str]:
+    """Return the checked tables scanned sequentially anywhere in a plan tree."""
+    return [
+        node["Relation Name"]
+        for node in walk(plan)
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in CHECKED_TABLES
+    ]
+
+
+def find_indexes(plan: dict) -> list[str]:
+    return [node["Index Name"] for node in walk(plan) if "Index Name" in node]
+
+
+async def explain(connection: AsyncConnection, query) -> dict:
+    sql = query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    result = await connection.scalar(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+async def main(file_count: int) -> int:
+    logger.info(f"Seeding {file_count} files for {USER_COUNT} users")
+    failures = []
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            await seed(connection, file_count)
+            sample = await pick_sample(connection)
+            for name, query in build_queries(sample).items():
+                plan = await explain(connection, query)
+                seq_scans = find_seq_scans(plan)
+                if seq_scans:
+                    failures.append(name)
+                    logger.error(f"FAIL {name}: Seq Scan on {', '.join(seq_scans)}")
+                else:
+                    logger.info(f"ok   {name}: {', '.join(find_indexes(plan))}")
+        finally:
+            await transaction.rollback()
+
+    if failures:
+        logger.error(f"{len(failures)} queries fall back to sequential scans")
+        return 1
+    logger.info("All queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)))
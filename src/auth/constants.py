@@ -3,3 +3,4 @@ from enum import Enum
 
 class TokenType(str, Enum):
     ACCESS = "access"
+    UPLOAD = "upload"
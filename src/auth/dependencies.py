@@ -5,7 +5,7 @@ from src.auth.constants import TokenType
 from src.auth.utils import decode_token
 from src.exceptions import NotAuthenticated, PermissionDenied
 from src.users.constants import Role
-from src.users.service import get_user_by_id
+from src.users.service import get_active_user_by_id
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -16,7 +16,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     if token_data.get("type") != TokenType.ACCESS.value:
         raise NotAuthenticated(detail="Invalid token type")
 
-    user = await get_user_by_id(token_data["sub"])
+    user = await get_active_user_by_id(token_data["sub"])
     if not user or not user["is_active"]:
         raise NotAuthenticated(detail="User not found or inactive")
 
@@ -14,3 +14,11 @@ class TokenExpired(DetailedHTTPException):
 class InvalidToken(DetailedHTTPException):
     STATUS_CODE = 401
     DETAIL = "Invalid token"
+
+
+class PasswordHashingBusy(DetailedHTTPException):
+    STATUS_CODE = 503
+    DETAIL = "Too many concurrent logins, try again shortly"
+
+    def __init__(self, detail: str | None = None):
+        super().__init__(detail=detail, headers={"Retry-After": "1"})
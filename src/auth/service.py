@@ -2,7 +2,7 @@ from datetime import timedelta
 
 from src.auth.exceptions import InvalidCredentials
 from src.auth.schemas import LoginRequest
-from src.auth.utils import create_access_token, verify_password
+from src.auth.utils import create_access_token, verify_password_async
 from src.config import settings
 from src.users.service import get_user_by_username
 
@@ -10,7 +10,9 @@ from src.users.service import get_user_by_username
 async def authenticate_user(login_data: LoginRequest) -> str:
     """Authenticate a user and return a JWT access token."""
     user = await get_user_by_username(login_data.username)
-    if not user or not verify_password(login_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(
+        login_data.password, user["hashed_password"]
+    ):
         raise InvalidCredentials()
     if not user["is_active"]:
         raise InvalidCredentials(detail="User is inactive")
@@ -1,16 +1,33 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Dict
+from typing import Callable, Dict, TypeVar
 
 import jwt
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
 
 from src.auth.constants import TokenType
-from src.auth.exceptions import InvalidToken, TokenExpired
+from src.auth.exceptions import InvalidToken, PasswordHashingBusy, TokenExpired
 from src.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+# bcrypt releases the GIL, so a few threads keep it off the event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_THREADS, thread_name_prefix="password-hash"
+)
+_password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+# Bulk imports hash on their own pool, which leaves a core to logins
+_bulk_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_BULK_THREADS
+    or max((os.cpu_count() or 1) - 1, 1),
+    thread_name_prefix="password-hash-bulk",
+)
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
@@ -22,6 +39,49 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password thread pool."""
+    return await _run_password_hashing(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password thread pool."""
+    return await _run_password_hashing(verify_password, plain_password, hashed_password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    """Hash many passwords in parallel on the bulk password pool."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(
+            loop.run_in_executor(_bulk_password_executor, hash_password, password)
+            for password in passwords
+        )
+    )
+
+
+async def _run_password_hashing(func: Callable[..., T], *args) -> T:
+    """
+    Run a bcrypt call on the thread pool, at most PASSWORD_HASH_MAX_CONCURRENCY
+    per worker. Callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT for a slot.
+    """
+    # The acquire runs in this task rather than in a wait_for task, so a
+    # timeout or cancellation can never leave a slot taken without a release
+    acquired = False
+    try:
+        try:
+            async with asyncio.timeout(settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+                acquired = await _password_slots.acquire()
+        except TimeoutError:
+            raise PasswordHashingBusy()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        if acquired:
+            _password_slots.release()
+
+
 def create_access_token(
     user_id: str, role: str, department_id: str, expires_delta: timedelta | None = None
 ) -> str:
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+_stats_registry: dict[str, "CacheStats"] = {}
+
+
+class CacheStats:
+    """Hit and miss counters of a cache tier, listed by get_cache_stats."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        _stats_registry[name] = self
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class TTLCache:
+    """
+    Per-process LRU cache whose entries expire `ttl` seconds after being set.
+    Used from the event loop only, so it needs no locking.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats(name)
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _LoadCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent loads of the same key in this process: the first
+    caller runs the load and later callers wait for its result. A waiter whose
+    leader is cancelled runs the load itself.
+    """
+
+    def __init__(self) -> None:
+        self._loads: dict[Hashable, asyncio.Future] = {}
+
+    async def load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._loads.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LoadCancelled:
+                return await load()
+
+        future = asyncio.get_running_loop().create_future()
+        self._loads[key] = future
+        try:
+            result = await load()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:  # Cancelled: waiters load for themselves
+            future.set_exception(_LoadCancelled())
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._loads[key]
+            if future.done() and not future.cancelled():
+                future.exception()  # Retrieved, even when nobody waited
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    """Return the counters of every cache tier of this process."""
+    return {name: stats.as_dict() for name, stats in _stats_registry.items()}
@@ -32,12 +32,39 @@ class Config(CustomBaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_THREADS: int = 2
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4  # bcrypt calls admitted per worker
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5.0  # seconds
+    PASSWORD_HASH_BULK_THREADS: int | None = None  # None uses CPU count - 1
+    USER_CACHE_TTL_SECONDS: int = 30  # Bounds how long deactivation takes
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_REDIS: bool = False
 
     AWS_ACCESS_KEY_ID: str
     AWS_SECRET_ACCESS_KEY: str
     AWS_S3_ENDPOINT_URL: str
     AWS_S3_BUCKET_NAME: str
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_KEEPALIVE_TIMEOUT: int = 60  # seconds
+    S3_PRESIGNED_URL_EXPIRE_SECONDS: int = 60 * 15  # 15 minutes
+    DOWNLOAD_URL_EXPIRE_SECONDS: int = 60 * 5  # 5 minutes
+    DOWNLOAD_REDIRECT_MIN_SIZE: int | None = None  # Bytes; None disables it
     REDIS_URL: str
+    PURGE_INTERVAL_SECONDS: int = 60
+    DOWNLOAD_COUNT_FLUSH_SECONDS: int = 10
+    EXTRACTION_BATCH_SIZE: int = 50  # Files per extraction task and upsert
+    EXTRACTION_BATCH_SECONDS: int = 2  # Longest wait for a batch to fill
+    EXTRACTION_QUEUE_SWEEP_SECONDS: int = 60  # Beat drain for missed batches
+    INLINE_METADATA_MAX_SIZE: int = 2 * 1024 * 1024  # Bytes; 0 disables it
+    INLINE_METADATA_PROCESSES: int = 2
+    INLINE_METADATA_MAX_PENDING: int = 8  # Beyond this, uploads use Celery
+    FILE_CACHE_ENABLED: bool = True
+    FILE_CACHE_TTL_SECONDS: int = 60 * 5  # Redis entries of single files
+    FILE_LIST_CACHE_TTL_SECONDS: int = 60  # Redis entries of listing pages
+    FILE_CACHE_LOCAL_TTL_SECONDS: int = 2  # Bounds staleness across processes
+    FILE_CACHE_MAX_SIZE: int = 10_000  # Per-process entries of each kind
+    UPLOAD_SESSION_EXPIRE_SECONDS: int = 60 * 60 * 24  # 24 hours
+    UPLOAD_SESSION_CLEANUP_SECONDS: int = 60 * 15  # Beat abort of expired sessions
 
     @model_validator(mode="after")
     def validate_sentry_non_local(self) -> "Config":
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Iterable
+from uuid import UUID, uuid4
+
+from redis.exceptions import RedisError, WatchError
+
+from src.cache import CacheStats, SingleFlight, TTLCache
+from src.config import settings
+from src.files.constants import (
+    FILE_CACHE_FILL_LOCK_SECONDS,
+    FILE_CACHE_FILL_POLL_SECONDS,
+    FILE_CACHE_KEY_PREFIX,
+    FILE_CACHE_TOMBSTONE,
+    FILE_CACHE_TOMBSTONE_SECONDS,
+    FILE_PAGE_CACHE_KEY_PREFIX,
+    FILE_PAGE_CACHE_VERSION_KEY,
+    FileType,
+    Visibility,
+)
+from src.redis import get_redis
+from src.users.constants import Role
+
+logger = logging.getLogger(__name__)
+
+_local_files = TTLCache(
+    "files",
+    maxsize=settings.FILE_CACHE_MAX_SIZE,
+    ttl=settings.FILE_CACHE_LOCAL_TTL_SECONDS,
+)
+_local_pages = TTLCache(
+    "file_pages",
+    maxsize=settings.FILE_CACHE_MAX_SIZE,
+    ttl=settings.FILE_CACHE_LOCAL_TTL_SECONDS,
+)
+_redis_file_stats = CacheStats("files.redis")
+_redis_page_stats = CacheStats("file_pages.redis")
+_fills = SingleFlight()
+
+_UUID_FIELDS = {"id", "owner_id", "department_id", "blob_id", "file_id"}
+_DATETIME_FIELDS = {"created_at", "updated_at", "deleted_at"}
+
+
+async def get_cached_file(
+    file_id: UUID, load: Callable[[], Awaitable[dict | None]]
+) -> dict | None:
+    """
+    Return a copy of a live file with its metadata, looking in this process,
+    then in Redis, then calling `load`. Missing files are not cached.
+    """
+    if not settings.FILE_CACHE_ENABLED:
+        return await load()
+
+    key = str(file_id)
+    file = _local_files.get(key)
+    if file is None:
+        file = await _read_through(
+            f"{FILE_CACHE_KEY_PREFIX}{key}",
+            load,
+            settings.FILE_CACHE_TTL_SECONDS,
+            _redis_file_stats,
+            _decode_file,
+        )
+        if file is None:
+            return None
+        _local_files.set(key, file)
+    return _copy_file(file)
+
+
+async def get_cached_page(page_key: str, load: Callable[[], Awaitable[dict]]) -> dict:
+    """
+    Return a copy of a listing page, cached like files under the current
+    listing version so that invalidate_file_pages orphans every page at once.
+    """
+    if not settings.FILE_CACHE_ENABLED:
+        return await load()
+
+    page = _local_pages.get(page_key)
+    if page is None:
+        try:
+            version = await get_redis().get(FILE_PAGE_CACHE_VERSION_KEY) or "0"
+        except RedisError as e:
+            logger.warning(f"Could not read the file listing version: {e}")
+            return await load()
+
+        page = await _read_through(
+            f"{FILE_PAGE_CACHE_KEY_PREFIX}{version}:{page_key}",
+            load,
+            settings.FILE_LIST_CACHE_TTL_SECONDS,
+            _redis_page_stats,
+            _decode_page,
+        )
+        _local_pages.set(page_key, page)
+    return {**page, "items": [_copy_file(file) for file in page["items"]]}
+
+
+def build_page_key(
+    current_user: dict, department_id: UUID | None, cursor: str | None, limit: int
+) -> str:
+    """
+    Key a listing page by what filter_accessible_files reads from the user, so
+    admins, and managers of one department, share their pages.
+    """
+    role = Role(current_user["role"])
+    if role == Role.ADMIN:
+        scope = "admin"
+    elif role == Role.MANAGER:
+        scope = f"manager:{current_user['department_id']}"
+    else:
+        scope = f"user:{current_user['department_id']}:{current_user['id']}"
+    return f"{scope}:{department_id or ''}:{cursor or ''}:{limit}"
+
+
+async def invalidate_files(file_ids: Iterable[UUID]) -> None:
+    """
+    Drop files and every listing page from the cache. Other processes keep
+    their local copies for at most FILE_CACHE_LOCAL_TTL_SECONDS.
+    """
+    keys = [str(file_id) for file_id in file_ids]
+    for key in keys:
+        _local_files.delete(key)
+    _local_pages.clear()
+    if not settings.FILE_CACHE_ENABLED:
+        return
+
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(
+                    f"{FILE_CACHE_KEY_PREFIX}{key}",
+                    f"{FILE_CACHE_TOMBSTONE}{uuid4().hex}",
+                    ex=FILE_CACHE_TOMBSTONE_SECONDS,
+                )
+            pipe.incr(FILE_PAGE_CACHE_VERSION_KEY)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not invalidate cached files {keys}: {e}")
+
+
+async def invalidate_file_pages() -> None:
+    """Drop every listing page from the cache, e.g. after an upload."""
+    await invalidate_files([])
+
+
+async def _read_through(
+    redis_key: str,
+    load: Callable[[], Awaitable[Any]],
+    ttl: int,
+    stats: CacheStats,
+    decode: Callable[[Any], Any],
+) -> Any:
+    """
+    Read a key from Redis or fill it with `load`. Concurrent misses in this
+    process share one fill, and across processes the fill lock lets a single
+    one query the database while the others poll for its result. The result
+    is stored only if the key still holds what the fill saw before loading,
+    so a tombstone stops just the fills that were in flight when it was
+    written.
+    """
+
+    async def fill() -> Any:
+        redis = get_redis()
+        lock_key = f"{redis_key}:lock"
+        try:
+            cached = await redis.get(redis_key)
+            if _is_value(cached):
+                stats.hits += 1
+                return decode(json.loads(cached))
+
+            stats.misses += 1
+            deadline = time.monotonic() + FILE_CACHE_FILL_LOCK_SECONDS
+            while not await redis.set(
+                lock_key, "1", nx=True, ex=FILE_CACHE_FILL_LOCK_SECONDS
+            ):
+                if time.monotonic() >= deadline:
+                    return await load()
+                await asyncio.sleep(FILE_CACHE_FILL_POLL_SECONDS)
+                cached = await redis.get(redis_key)
+                if _is_value(cached):
+                    return decode(json.loads(cached))
+            # The previous holder may have stored the value before releasing
+            seen = await redis.get(redis_key)
+            seen_at = time.monotonic()
+        except RedisError as e:
+            logger.warning(f"Could not read {redis_key} from Redis: {e}")
+            return await load()
+
+        try:
+            if _is_value(seen):
+                return decode(json.loads(seen))
+
+            value = await load()
+            # A fill outliving the tombstone could not tell it was invalidated
+            stale = time.monotonic() - seen_at >= FILE_CACHE_TOMBSTONE_SECONDS
+            if value is not None and not stale:
+                await _store(redis_key, value, ttl, seen)
+            return value
+        finally:
+            try:
+                await redis.delete(lock_key)
+            except RedisError:
+                pass  # Expires after FILE_CACHE_FILL_LOCK_SECONDS
+
+    return await _fills.load(redis_key, fill)
+
+
+async def _store(redis_key: str, value: Any, ttl: int, seen: str | None) -> None:
+    """
+    Cache a loaded value unless the key changed since `seen` was read before
+    the load, i.e. an invalidation wrote a new tombstone meanwhile.
+    """
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            await pipe.watch(redis_key)
+            if await pipe.get(redis_key) != seen:
+                return
+            pipe.multi()
+            pipe.set(redis_key, json.dumps(value, default=str), ex=ttl)
+            await pipe.execute()
+    except WatchError:
+        pass  # Invalidated while storing
+    except RedisError as e:
+        logger.warning(f"Could not cache {redis_key} in Redis: {e}")
+
+
+def _is_value(cached: str | None) -> bool:
+    return cached is not None and not cached.startswith(FILE_CACHE_TOMBSTONE)
+
+
+def _copy_file(file: dict) -> dict:
+    return {**file, "file_metadata": dict(file["file_metadata"])}
+
+
+def _decode_row(row: dict) -> dict:
+    for key in _UUID_FIELDS & row.keys():
+        if row[key] is not None:
+            row[key] = UUID(row[key])
+    for key in _DATETIME_FIELDS & row.keys():
+        if row[key] is not None:
+            row[key] = datetime.fromisoformat(row[key])
+    return row
+
+
+def _decode_file(file: dict) -> dict:
+    _decode_row(file)
+    file["file_type"] = FileType(file["file_type"])
+    file["visibility"] = Visibility(file["visibility"])
+    _decode_row(file["file_metadata"])
+    return file
+
+
+def _decode_page(page: dict) -> dict:
+    page["items"] = [_decode_file(file) for file in page["items"]]
+    return page
@@ -11,3 +11,74 @@ class FileType(str, Enum):
     PDF = "PDF"
     DOC = "DOC"
     DOCX = "DOCX"
+
+
+# S3 requires every multipart part except the last one to be at least 5 MiB.
+S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+S3_MULTIPART_MAX_CONCURRENCY = 3
+S3_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# DeleteObjects accepts at most 1000 keys per request
+S3_DELETE_BATCH_SIZE = 1000
+S3_RANGE_READ_BLOCK_SIZE = 64 * 1024  # 64 KiB
+S3_RANGE_READ_MAX_BLOCKS = 256  # 16 MiB of cached blocks per reader
+
+BATCH_UPLOAD_MAX_FILES = 100
+BATCH_UPLOAD_MAX_CONCURRENCY = 4
+BULK_DELETE_MAX_FILES = 1000
+ZIP_DOWNLOAD_MAX_FILES = 1000
+# Expired upload sessions aborted per cleanup transaction
+UPLOAD_SESSION_CLEANUP_BATCH_SIZE = 100
+# S3 objects fetched ahead while streaming a ZIP, each buffering up to 1 MiB
+ZIP_PREFETCH_FILES = 4
+ZIP_PREFETCH_CHUNKS = 16
+METADATA_EXTRACTION_CONCURRENCY = 8
+
+# Full-text search over extracted document text
+SEARCH_TEXT_CONFIG = "english"
+SEARCH_TEXT_MAX_CHARS = 100_000
+# Bytes a range-read PDF may fetch for its text before extraction stops
+SEARCH_TEXT_MAX_FETCH_BYTES = 8 * 1024 * 1024
+SEARCH_DEFAULT_RESULTS = 20
+SEARCH_MAX_RESULTS = 100
+SEARCH_HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5"
+# Indexed text columns of file_metadata, never returned with the metadata
+METADATA_SEARCH_COLUMNS = ("content_text", "search_vector")
+
+# Every file response needs authentication, so only the client may cache it.
+# Stored content never changes; access to private files is checked every time.
+DOWNLOAD_CACHE_CONTROL = {
+    Visibility.PUBLIC: "private, max-age=3600",
+    Visibility.DEPARTMENT: "private, max-age=300",
+    Visibility.PRIVATE: "private, no-cache",
+}
+# File info changes when metadata extraction finishes, so it is always revalidated
+FILE_INFO_CACHE_CONTROL = "private, no-cache"
+
+# Prefix of file_metadata columns in queries that join them onto files
+METADATA_PREFIX = "file_metadata__"
+
+# Redis keys of the read-through cache of files and listing pages
+FILE_CACHE_KEY_PREFIX = "files:cache:file:"
+FILE_PAGE_CACHE_KEY_PREFIX = "files:cache:page:"
+# Bumped on every change that may alter a listing, which orphans cached pages
+FILE_PAGE_CACHE_VERSION_KEY = "files:cache:page_version"
+# Prefix of the unique value written on invalidation, so that a fill which read
+# the key before the change cannot store what it loaded. Fills that take longer
+# than the tombstone lasts don't store at all
+FILE_CACHE_TOMBSTONE = "-"
+FILE_CACHE_TOMBSTONE_SECONDS = 5
+# A cold key is filled by one process at a time; others poll for its result
+FILE_CACHE_FILL_LOCK_SECONDS = 5
+FILE_CACHE_FILL_POLL_SECONDS = 0.02
+
+# Redis keys of the coalesced download counters
+DOWNLOAD_COUNTS_KEY = "files:download_counts"
+DOWNLOAD_COUNTS_SNAPSHOT_PREFIX = "files:download_counts:flushing:"
+DOWNLOAD_COUNTS_STALE_SNAPSHOT_SECONDS = 300
+DOWNLOAD_COUNTS_APPLIED_RETENTION_SECONDS = 24 * 60 * 60  # Applied snapshot ids
+
+# Redis keys of the pending metadata extraction jobs
+EXTRACTION_QUEUE_KEY = "files:extraction_queue"
+EXTRACTION_QUEUE_SNAPSHOT_PREFIX = "files:extraction_queue:draining:"
+EXTRACTION_QUEUE_STALE_SNAPSHOT_SECONDS = 900
+EXTRACTION_QUEUE_FAILED_KEY = "files:extraction_queue:failed"  # Dead letters
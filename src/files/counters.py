@@ -0,0 +1,178 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import Integer, column, delete, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.database import engine, execute, fetch_one
+from src.files.cache import invalidate_files
+from src.files.constants import (
+    DOWNLOAD_COUNTS_APPLIED_RETENTION_SECONDS,
+    DOWNLOAD_COUNTS_KEY,
+    DOWNLOAD_COUNTS_SNAPSHOT_PREFIX,
+    DOWNLOAD_COUNTS_STALE_SNAPSHOT_SECONDS,
+)
+from src.files.models import DownloadCountSnapshot, File
+from src.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+async def record_downloads(file_ids: list[UUID]) -> None:
+    """
+    Count one download per file id in a Redis hash; flush_download_counts
+    moves them to Postgres. Falls back to a direct UPDATE if Redis is down.
+    """
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        for file_id in file_ids:
+            pipeline.hincrby(DOWNLOAD_COUNTS_KEY, str(file_id), 1)
+        await pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Redis unavailable, counting downloads in Postgres: {e}")
+        deltas: dict[UUID, int] = {}
+        for file_id in file_ids:
+            deltas[file_id] = deltas.get(file_id, 0) + 1
+        await apply_download_counts(deltas)
+
+
+async def get_pending_downloads(file_ids: list[UUID]) -> dict[UUID, int]:
+    """Return the downloads not yet flushed to Postgres, keyed by file id."""
+    if not file_ids:
+        return {}
+
+    try:
+        counts = await get_redis().hmget(
+            DOWNLOAD_COUNTS_KEY, [str(file_id) for file_id in file_ids]
+        )
+    except RedisError as e:
+        logger.warning(f"Could not read pending download counts: {e}")
+        return {}
+    return {file_id: int(count) for file_id, count in zip(file_ids, counts) if count}
+
+
+async def flush_download_counts() -> int:
+    """
+    Move pending download counts to Postgres in one batched UPDATE.
+
+    The pending hash is RENAMEd to a snapshot key owned by this flush, so
+    increments arriving meanwhile start a fresh hash and concurrent flushes
+    in other workers or pods never see the same counts. Snapshots left by a
+    crashed, failed or slow flush are adopted once they are older than
+    DOWNLOAD_COUNTS_STALE_SNAPSHOT_SECONDS; each snapshot is applied at most
+    once, so adopting one that was applied already is harmless. Returns the
+    number of downloads.
+    """
+    redis = get_redis()
+    snapshots = await adopt_stale_snapshots()
+    snapshot = new_snapshot_key()
+    try:
+        await redis.rename(DOWNLOAD_COUNTS_KEY, snapshot)
+        snapshots.append(snapshot)
+    except ResponseError:
+        pass  # No downloads since the last flush
+
+    flushed = 0
+    for snapshot in snapshots:
+        flushed += await flush_snapshot(snapshot)
+    if flushed:
+        logger.info(f"Flushed {flushed} downloads to the database")
+    return flushed
+
+
+async def flush_snapshot(snapshot: str) -> int:
+    """
+    Apply one snapshot hash. On error the snapshot is left for a later flush
+    to adopt: the counts may have been applied by another flush meanwhile.
+    """
+    redis = get_redis()
+    counts = await redis.hgetall(snapshot)
+    deltas = {UUID(file_id): int(count) for file_id, count in counts.items()}
+    flushed = 0
+    if deltas and await apply_download_counts(deltas, parse_snapshot_id(snapshot)):
+        flushed = sum(deltas.values())
+    await redis.delete(snapshot)
+    return flushed
+
+
+async def adopt_stale_snapshots() -> list[str]:
+    """Take over snapshots whose flush died before deleting them."""
+    redis = get_redis()
+    stale_before = time.time() - DOWNLOAD_COUNTS_STALE_SNAPSHOT_SECONDS
+    adopted = []
+    async for key in redis.scan_iter(match=f"{DOWNLOAD_COUNTS_SNAPSHOT_PREFIX}*"):
+        created_at = key.removeprefix(DOWNLOAD_COUNTS_SNAPSHOT_PREFIX).split(":")[0]
+        if int(created_at) > stale_before:
+            continue
+
+        # The snapshot keeps its id, which apply_download_counts records
+        snapshot = new_snapshot_key(parse_snapshot_id(key))
+        try:
+            await redis.rename(key, snapshot)
+        except ResponseError:
+            continue  # Adopted by another flush
+        logger.warning(f"Adopted stale download count snapshot {key}")
+        adopted.append(snapshot)
+    return adopted
+
+
+async def apply_download_counts(
+    deltas: dict[UUID, int], snapshot_id: str | None = None
+) -> bool:
+    """
+    Add download counts to their files with a single UPDATE ... FROM VALUES.
+
+    The id of the snapshot the counts come from is recorded in the same
+    transaction; when it was recorded already nothing is updated and False is
+    returned. Concurrent flushes of one snapshot wait for each other on the
+    unique snapshot_id.
+    """
+    downloads = values(
+        column("id", PG_UUID(as_uuid=True)), column("count", Integer), name="downloads"
+    ).data(list(deltas.items()))
+    async with engine.begin() as connection:
+        if snapshot_id:
+            recorded = await fetch_one(
+                pg_insert(DownloadCountSnapshot)
+                .values(snapshot_id=snapshot_id)
+                .on_conflict_do_nothing(index_elements=["snapshot_id"])
+                .returning(DownloadCountSnapshot.id),
+                connection,
+            )
+            if not recorded:
+                logger.warning(f"Download counts of {snapshot_id} already applied")
+                return False
+
+            applied_before = datetime.utcnow() - timedelta(
+                seconds=DOWNLOAD_COUNTS_APPLIED_RETENTION_SECONDS
+            )
+            await execute(
+                delete(DownloadCountSnapshot).where(
+                    DownloadCountSnapshot.created_at < applied_before
+                ),
+                connection,
+            )
+
+        await execute(
+            update(File)
+            .where(File.id == downloads.c.id)
+            .values(download_count=File.download_count + downloads.c.count),
+            connection,
+        )
+    await invalidate_files(deltas.keys())
+    return True
+
+
+def new_snapshot_key(snapshot_id: str | None = None) -> str:
+    snapshot_id = snapshot_id or uuid.uuid4().hex
+    return f"{DOWNLOAD_COUNTS_SNAPSHOT_PREFIX}{int(time.time())}:{snapshot_id}"
+
+
+def parse_snapshot_id(snapshot: str) -> str:
+    """The id of a snapshot key, which stays the same when it is adopted."""
+    return snapshot.rsplit(":", 1)[1]
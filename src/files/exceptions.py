@@ -1,4 +1,11 @@
-from src.exceptions import BadRequest, NotFound, PermissionDenied
+from fastapi import status
+
+from src.exceptions import (
+    BadRequest,
+    DetailedHTTPException,
+    NotFound,
+    PermissionDenied,
+)
 
 
 class FileNotFound(NotFound):
@@ -17,5 +24,42 @@ class InvalidVisibility(BadRequest):
     DETAIL = "Invalid visibility for role"
 
 
+class TooManyFiles(BadRequest):
+    DETAIL = "Too many files in one request"
+
+
+class InvalidUploadToken(BadRequest):
+    DETAIL = "Invalid or expired upload token"
+
+
+class UploadIncomplete(BadRequest):
+    DETAIL = "Uploaded object is missing or does not match the declared size"
+
+
+class UploadSessionNotFound(NotFound):
+    DETAIL = "Upload session not found"
+
+
+class UploadSessionExpired(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_410_GONE
+    DETAIL = "Upload session has expired"
+
+
+class UploadSessionCompleted(BadRequest):
+    DETAIL = "Upload session is already complete"
+
+
+class InvalidChunk(BadRequest):
+    DETAIL = "Chunk does not match the part layout of the upload session"
+
+
 class FileAccessDenied(PermissionDenied):
     DETAIL = "No access to this file"
+
+
+class RangeNotSatisfiable(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    DETAIL = "Requested range not satisfiable"
+
+    def __init__(self, file_size: int):
+        super().__init__(headers={"Content-Range": f"bytes */{file_size}"})
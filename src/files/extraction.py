@@ -0,0 +1,201 @@
+import json
+import logging
+import time
+import uuid
+
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from src.config import settings
+from src.files.constants import (
+    EXTRACTION_QUEUE_FAILED_KEY,
+    EXTRACTION_QUEUE_KEY,
+    EXTRACTION_QUEUE_SNAPSHOT_PREFIX,
+    EXTRACTION_QUEUE_STALE_SNAPSHOT_SECONDS,
+)
+from src.files.metadata import extract_files_metadata
+from src.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Failures that say nothing about the jobs themselves: the jobs are retried
+# by a later drain instead of being moved to the failed list
+TRANSIENT_ERRORS = (
+    InterfaceError,
+    OperationalError,
+    RedisConnectionError,
+    RedisTimeoutError,
+    OSError,
+    BotoConnectionError,  # Includes EndpointConnectionError and connect timeouts
+    HTTPClientError,  # Read timeouts and connections dropped mid-response
+)
+# S3 error responses worth retrying, besides any 5xx
+TRANSIENT_S3_ERROR_CODES = {
+    "RequestTimeout",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+}
+
+
+async def queue_extractions(jobs: list[tuple[str, str, str]]) -> int:
+    """
+    Append (file_id, s3_key, file_type) jobs to the pending extraction list.
+    Returns the length of the list before they were added.
+    """
+    queued = await get_redis().rpush(
+        EXTRACTION_QUEUE_KEY, *(json.dumps(list(job)) for job in jobs)
+    )
+    return queued - len(jobs)
+
+
+async def drain_extraction_queue() -> int:
+    """
+    Extract metadata for every pending job, EXTRACTION_BATCH_SIZE files per
+    upsert.
+
+    The pending list is RENAMEd to a snapshot key owned by this drain, so jobs
+    queued meanwhile start a fresh list and concurrent drains never take the
+    same jobs. Each batch is trimmed off the snapshot once saved. A batch that
+    fails to save is retried job by job. Jobs that fail on a transient error,
+    such as S3 being unreachable, go back to the pending list, and the others
+    are moved to EXTRACTION_QUEUE_FAILED_KEY. If the database or Redis is
+    unreachable, the rest of the snapshot goes back to the pending list. Snapshots
+    left by a crashed drain are adopted once they are older than
+    EXTRACTION_QUEUE_STALE_SNAPSHOT_SECONDS. Returns the number of files
+    whose metadata was saved.
+    """
+    redis = get_redis()
+    snapshots = await adopt_stale_snapshots()
+    snapshot = new_snapshot_key()
+    try:
+        await redis.rename(EXTRACTION_QUEUE_KEY, snapshot)
+        snapshots.append(snapshot)
+    except ResponseError:
+        pass  # Nothing queued since the last drain
+
+    saved = 0
+    for snapshot in snapshots:
+        saved += await drain_snapshot(snapshot)
+    return saved
+
+
+async def drain_snapshot(snapshot: str) -> int:
+    """Extract the jobs of one snapshot list batch by batch, then delete it."""
+    redis = get_redis()
+    batch_size = settings.EXTRACTION_BATCH_SIZE
+    saved = 0
+    while jobs := await redis.lrange(snapshot, 0, batch_size - 1):
+        try:
+            try:
+                batch_saved, failed = await extract_files_metadata(
+                    [json.loads(job) for job in jobs]
+                )
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                logger.error(
+                    f"Metadata batch of {len(jobs)} files failed, "
+                    f"retrying it job by job: {str(e)}"
+                )
+                batch_saved, failed = await extract_jobs_one_by_one(jobs)
+            saved += batch_saved
+            await settle_failed_jobs(failed)
+        except Exception:
+            pipeline = redis.pipeline(transaction=True)
+            pipeline.rpush(EXTRACTION_QUEUE_KEY, *await redis.lrange(snapshot, 0, -1))
+            pipeline.delete(snapshot)
+            await pipeline.execute()
+            raise
+        await redis.ltrim(snapshot, len(jobs), -1)
+        logger.info(f"Extracted metadata for a batch of {len(jobs)} files")
+
+    await redis.delete(snapshot)
+    return saved
+
+
+async def extract_jobs_one_by_one(
+    jobs: list[str],
+) -> tuple[int, list[tuple[list[str], Exception]]]:
+    """
+    Extract and save each job on its own, so a job whose metadata cannot be
+    saved fails alone. Transient errors are raised.
+    """
+    saved = 0
+    failed = []
+    for job in jobs:
+        job = json.loads(job)
+        try:
+            job_saved, job_failed = await extract_files_metadata([job])
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            job_saved, job_failed = 0, [(job, e)]
+        saved += job_saved
+        failed += job_failed
+    return saved, failed
+
+
+async def settle_failed_jobs(failed: list[tuple[list[str], Exception]]) -> None:
+    """
+    Put the jobs that failed on a transient error back on the pending list,
+    for the next sweep of the queue, and move the others to
+    EXTRACTION_QUEUE_FAILED_KEY so they cannot hold up the queue.
+    """
+    if not failed:
+        return
+
+    retried, dead = [], []
+    for job, error in failed:
+        if is_transient_error(error):
+            logger.warning(f"Requeueing extraction job {job}: {str(error)}")
+            retried.append(json.dumps(job))
+        else:
+            logger.error(
+                f"Moving extraction job {job} to the failed list: {str(error)}"
+            )
+            dead.append(json.dumps(job))
+
+    pipeline = get_redis().pipeline(transaction=True)
+    if retried:
+        pipeline.rpush(EXTRACTION_QUEUE_KEY, *retried)
+    if dead:
+        pipeline.rpush(EXTRACTION_QUEUE_FAILED_KEY, *dead)
+    await pipeline.execute()
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an extraction may succeed if it is simply tried again later."""
+    if isinstance(error, ClientError):
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        code = error.response.get("Error", {}).get("Code")
+        return status >= 500 or code in TRANSIENT_S3_ERROR_CODES
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+async def adopt_stale_snapshots() -> list[str]:
+    """Take over snapshots whose drain died before deleting them."""
+    redis = get_redis()
+    stale_before = time.time() - EXTRACTION_QUEUE_STALE_SNAPSHOT_SECONDS
+    adopted = []
+    async for key in redis.scan_iter(match=f"{EXTRACTION_QUEUE_SNAPSHOT_PREFIX}*"):
+        created_at = key.removeprefix(EXTRACTION_QUEUE_SNAPSHOT_PREFIX).split(":")[0]
+        if int(created_at) > stale_before:
+            continue
+
+        snapshot = new_snapshot_key()
+        try:
+            await redis.rename(key, snapshot)
+        except ResponseError:
+            continue  # Adopted by another drain
+        logger.warning(f"Adopted stale extraction queue snapshot {key}")
+        adopted.append(snapshot)
+    return adopted
+
+
+def new_snapshot_key() -> str:
+    return f"{EXTRACTION_QUEUE_SNAPSHOT_PREFIX}{int(time.time())}:{uuid.uuid4().hex}"
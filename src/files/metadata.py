@@ -0,0 +1,421 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator
+from uuid import UUID
+
+from docx import Document
+from PyPDF2 import PageObject, PdfReader
+from PyPDF2.generic import IndirectObject
+from sqlalchemy import String, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.config import settings
+from src.database import engine, execute, fetch_all
+from src.files.cache import invalidate_files
+from src.files.constants import (
+    METADATA_EXTRACTION_CONCURRENCY,
+    SEARCH_TEXT_MAX_CHARS,
+    SEARCH_TEXT_MAX_FETCH_BYTES,
+    FileType,
+)
+from src.files.exceptions import FileNotFound
+from src.files.models import File, FileMetadata
+from src.files.s3 import download_from_s3
+from src.files.s3_reader import S3RangeReader
+
+logger = logging.getLogger(__name__)
+
+# Parsing blocks on S3RangeReader fetches that run on the event loop, which
+# needs its default executor for DNS lookups, so parsing gets its own threads
+_parse_executor = ThreadPoolExecutor(
+    max_workers=METADATA_EXTRACTION_CONCURRENCY, thread_name_prefix="metadata-parse"
+)
+
+# Parses small uploads during the request. PyPDF2 and python-docx are pure
+# Python and hold the GIL, so they run in processes rather than threads that
+# would stall the event loop. Spawned, since forking copies the loop's threads
+_inline_executor = ProcessPoolExecutor(
+    max_workers=settings.INLINE_METADATA_PROCESSES,
+    mp_context=multiprocessing.get_context("spawn"),
+)
+_inline_slots = asyncio.Semaphore(settings.INLINE_METADATA_MAX_PENDING)
+
+# Begins a text object in a content stream
+TEXT_OBJECT_OPERATOR = re.compile(rb"\bBT\b")
+# Bytes read from the start of an XObject to find its subtype, which is in the
+# dictionary ahead of the stream data
+XOBJECT_HEADER_BYTES = 1024
+IMAGE_SUBTYPE = re.compile(rb"/Subtype\s*/Image\b")
+
+# Columns written by extraction; search_vector is generated from them
+METADATA_COLUMNS = [
+    column.name
+    for column in FileMetadata.__table__.c
+    if column.name not in ("id", "file_id", "created_at", "updated_at")
+    and not column.computed
+]
+# Length limits of the VARCHAR metadata columns, None for TEXT
+STRING_COLUMN_LENGTHS = {
+    column.name: column.type.length
+    for column in FileMetadata.__table__.c
+    if column.name in METADATA_COLUMNS and isinstance(column.type, String)
+}
+
+
+async def extract_files_metadata(
+    jobs: list[list[str]],
+) -> tuple[int, list[tuple[list[str], Exception]]]:
+    """
+    Extract metadata for a batch of (file_id, s3_key, file_type) jobs, with up
+    to METADATA_EXTRACTION_CONCURRENCY files in flight, and save it all with
+    one upsert. A file that fails doesn't hold up the rest of the batch.
+    Returns the number of files whose metadata was saved, and the jobs that
+    failed with their errors.
+    """
+    slots = asyncio.Semaphore(METADATA_EXTRACTION_CONCURRENCY)
+    extracted: dict[str, dict] = {}
+    failed: list[tuple[list[str], Exception]] = []
+
+    async def extract(file_id: str, s3_key: str, file_type: str) -> None:
+        async with slots:
+            try:
+                extracted[file_id] = await read_file_metadata(
+                    file_id, s3_key, file_type
+                )
+            except Exception as e:
+                failed.append(([file_id, s3_key, file_type], e))
+
+    await asyncio.gather(*(extract(*job) for job in jobs))
+    return await save_metadata_batch(extracted), failed
+
+
+async def read_file_metadata(file_id: str, s3_key: str, file_type: str) -> dict:
+    """Fetch a file from S3 and parse its metadata off the event loop."""
+    if file_type == FileType.PDF.value:
+        return await read_pdf_metadata(file_id, s3_key)
+
+    file_content = await download_from_s3(s3_key)
+    return await asyncio.get_running_loop().run_in_executor(
+        _parse_executor, parse_metadata, file_type, file_content
+    )
+
+
+async def read_pdf_metadata(file_id: str, s3_key: str) -> dict:
+    """
+    Parse PDF metadata through an S3RangeReader, so only the trailer, xref and
+    the objects the parser touches are transferred. Falls back to downloading
+    the whole file if the parse fails.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        reader = await loop.run_in_executor(
+            _parse_executor, S3RangeReader, s3_key, loop
+        )
+        metadata = await loop.run_in_executor(
+            _parse_executor, parse_pdf_metadata, reader
+        )
+    except FileNotFound:
+        raise
+    except Exception as e:
+        logger.warning(f"Range read failed for {s3_key}, downloading it: {str(e)}")
+        file_content = await download_from_s3(s3_key)
+        logger.info(
+            f"Fetched {len(file_content)} bytes for metadata of file_id: {file_id}"
+        )
+        return await loop.run_in_executor(
+            _parse_executor, parse_metadata, FileType.PDF.value, file_content
+        )
+
+    logger.info(
+        f"Fetched {reader.bytes_fetched} of {reader.size} bytes in "
+        f"{reader.request_count} requests for metadata of file_id: {file_id}"
+    )
+    return metadata
+
+
+async def start_inline_metadata_pool() -> None:
+    """
+    Spawn the inline parse processes, so the first uploads don't wait for them
+    to import the app.
+    """
+    if not settings.INLINE_METADATA_MAX_SIZE:
+        return
+
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(_inline_executor, os.getpid)
+            for _ in range(settings.INLINE_METADATA_PROCESSES)
+        )
+    )
+
+
+def can_extract_inline(file_size: int) -> bool:
+    """Whether an upload is small enough to parse in the API process."""
+    return 0 < file_size <= settings.INLINE_METADATA_MAX_SIZE
+
+
+async def extract_inline_metadata(file_type: str, fileobj: BinaryIO) -> dict | None:
+    """
+    Parse the metadata of a small upload from its spooled content in the inline
+    process pool. Returns None when INLINE_METADATA_MAX_PENDING parses are already in
+    flight or parsing fails, leaving the file to the Celery task.
+    """
+    if _inline_slots.locked():
+        return None
+
+    async with _inline_slots:
+        loop = asyncio.get_running_loop()
+        try:
+            # The spool may be on disk, so it is read on a thread
+            file_content = await loop.run_in_executor(None, _read_fileobj, fileobj)
+            return await loop.run_in_executor(
+                _inline_executor, parse_metadata, file_type, file_content
+            )
+        except Exception as e:
+            logger.warning(f"Inline metadata extraction failed: {str(e)}")
+            return None
+
+
+def _read_fileobj(fileobj: BinaryIO) -> bytes:
+    fileobj.seek(0)
+    try:
+        return fileobj.read()
+    finally:
+        fileobj.seek(0)
+
+
+def parse_metadata(file_type: str, file_content: bytes) -> dict:
+    """Read the document properties of a PDF or DOCX file."""
+    if file_type == FileType.PDF.value:
+        return parse_pdf_metadata(io.BytesIO(file_content))
+    if file_type == FileType.DOCX.value:
+        return parse_docx_metadata(io.BytesIO(file_content))
+    return {}
+
+
+def parse_pdf_metadata(stream: BinaryIO) -> dict:
+    pdf = PdfReader(stream)
+    info = pdf.metadata or {}
+    return {
+        "page_count": len(pdf.pages),
+        "title": info.get("/Title", ""),
+        "author": info.get("/Author", ""),
+        "creation_date": info.get("/CreationDate", ""),
+        "creator": info.get("/Creator", ""),
+        "content_text": join_search_text(iter_pdf_text(pdf)),
+    }
+
+
+def iter_pdf_text(pdf: PdfReader) -> Iterator[str]:
+    """
+    Yield the text of each page. Pages are parsed lazily, so a range-read
+    PDF only fetches the pages needed to fill SEARCH_TEXT_MAX_CHARS, and
+    stops once it has fetched SEARCH_TEXT_MAX_FETCH_BYTES for the text. Pages
+    of a range-read PDF that only draw images, such as scans, are skipped
+    before their images are fetched.
+    """
+    range_read = isinstance(pdf.stream, S3RangeReader)
+    fetched_before = getattr(pdf.stream, "bytes_fetched", 0)
+    for number, page in enumerate(pdf.pages):
+        fetched = getattr(pdf.stream, "bytes_fetched", 0) - fetched_before
+        if fetched >= SEARCH_TEXT_MAX_FETCH_BYTES:
+            logger.info(
+                f"Stopped PDF text extraction at page {number} of "
+                f"{len(pdf.pages)} after fetching {fetched} bytes for its text"
+            )
+            return
+        try:
+            if not range_read or has_text(pdf, page):
+                yield page.extract_text()
+        except Exception as e:
+            logger.warning(f"Could not extract text of page {number}: {str(e)}")
+
+
+def has_text(pdf: PdfReader, page: PageObject) -> bool:
+    """
+    Whether a page may show text: it has fonts, starts a text object or draws
+    an XObject that is not an image, such as a form with text of its own.
+    extract_text reads every XObject of a page to find its forms, which for a
+    scan means fetching all of its images.
+    """
+    resources = page.get("/Resources")
+    resources = resources.get_object() if resources is not None else {}
+    if "/Font" in resources:
+        return True
+    contents = page.get_contents()
+    if contents is not None and TEXT_OBJECT_OPERATOR.search(contents.get_data()):
+        return True
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    return not all(is_image_xobject(pdf, xobjects.raw_get(name)) for name in xobjects)
+
+
+def is_image_xobject(pdf: PdfReader, xobject) -> bool:
+    """
+    Whether an XObject is an image, read from the start of its dictionary
+    rather than by loading the object with its stream. Anything that can't be
+    told apart that way counts as a possible form.
+    """
+    if not isinstance(xobject, IndirectObject):
+        return xobject.get("/Subtype") == "/Image"
+    if resolved := pdf.cache_get_indirect_object(xobject.generation, xobject.idnum):
+        return resolved.get("/Subtype") == "/Image"
+
+    offset = pdf.xref.get(xobject.generation, {}).get(xobject.idnum)
+    if offset is None:
+        return False
+    position = pdf.stream.tell()
+    try:
+        pdf.stream.seek(offset)
+        header = pdf.stream.read(XOBJECT_HEADER_BYTES)
+    finally:
+        pdf.stream.seek(position)
+    dictionary, found, _ = header.partition(b"stream")
+    return bool(found) and bool(IMAGE_SUBTYPE.search(dictionary))
+
+
+def parse_docx_metadata(stream: BinaryIO) -> dict:
+    doc = Document(stream)
+    return {
+        "paragraph_count": len([p for p in doc.paragraphs if p.text.strip()]),
+        "table_count": len(doc.tables),
+        "title": doc.core_properties.title or "",
+        "author": doc.core_properties.author or "",
+        "creation_date": str(doc.core_properties.created)
+        if doc.core_properties.created
+        else "",
+        "content_text": join_search_text(
+            [paragraph.text for paragraph in doc.paragraphs]
+            + [
+                cell.text
+                for table in doc.tables
+                for row in table.rows
+                for cell in row.cells
+            ]
+        ),
+    }
+
+
+def join_search_text(parts: Iterable[str]) -> str:
+    """Join text parts until SEARCH_TEXT_MAX_CHARS, dropping NULs Postgres rejects."""
+    text, length = [], 0
+    for part in parts:
+        part = part.replace("\x00", "").strip()
+        if not part:
+            continue
+        text.append(part[: SEARCH_TEXT_MAX_CHARS - length])
+        length += len(text[-1]) + 1
+        if length >= SEARCH_TEXT_MAX_CHARS:
+            break
+    return "\n".join(text)
+
+
+async def save_metadata(file_id: str, metadata: dict) -> None:
+    """Save the metadata of a file unless the file is gone."""
+    await save_metadata_batch({file_id: metadata})
+
+
+async def save_metadata_batch(metadata_by_file: dict[str, dict]) -> int:
+    """
+    Upsert the metadata of many files with one INSERT ... ON CONFLICT (file_id)
+    DO UPDATE, so a redelivered or retried extraction overwrites its earlier
+    result. Files that are gone are skipped; the rest are share-locked so a
+    purge cannot delete them before the insert. If Postgres rejects the batch,
+    the rows are retried one by one and the rejected ones skipped. Returns the
+    rows written.
+    """
+    if not metadata_by_file:
+        return 0
+
+    metadata_by_id = {
+        UUID(file_id): metadata for file_id, metadata in metadata_by_file.items()
+    }
+    async with engine.begin() as connection:
+        existing = {
+            row["id"]
+            for row in await fetch_all(
+                select(File.id)
+                .where(File.id.in_(metadata_by_id))
+                .with_for_update(read=True),
+                connection,
+            )
+        }
+        for file_id in metadata_by_id.keys() - existing:
+            logger.warning(f"File not found for metadata extraction: {file_id}")
+        if not existing:
+            return 0
+
+        metadata_rows = [
+            build_metadata_row(file_id, metadata)
+            for file_id, metadata in metadata_by_id.items()
+            if file_id in existing
+        ]
+        try:
+            async with connection.begin_nested():
+                await upsert_metadata_rows(metadata_rows, connection)
+            written = len(metadata_rows)
+        except DBAPIError as e:
+            logger.warning(
+                f"Metadata batch upsert failed, saving its rows one by one: {str(e)}"
+            )
+            written = await upsert_metadata_rows_one_by_one(metadata_rows, connection)
+    await invalidate_files(existing)
+    logger.info(f"Metadata saved for file_ids: {[str(i) for i in existing]}")
+    return written
+
+
+async def upsert_metadata_rows(rows: list[dict], connection: AsyncConnection) -> None:
+    """Insert metadata rows, overwriting the metadata a file already has."""
+    upsert_query = pg_insert(FileMetadata).values(rows)
+    upsert_query = upsert_query.on_conflict_do_update(
+        index_elements=[FileMetadata.file_id],
+        set_={
+            **{column: upsert_query.excluded[column] for column in METADATA_COLUMNS},
+            "updated_at": datetime.utcnow(),
+        },
+    )
+    await execute(upsert_query, connection)
+
+
+async def upsert_metadata_rows_one_by_one(
+    rows: list[dict], connection: AsyncConnection
+) -> int:
+    """
+    Upsert each row under its own savepoint, so a row Postgres rejects is
+    logged and skipped without losing the others. Returns the rows written.
+    """
+    written = 0
+    for row in rows:
+        try:
+            async with connection.begin_nested():
+                await upsert_metadata_rows([row], connection)
+            written += 1
+        except DBAPIError as e:
+            logger.error(
+                f"Could not save metadata for file_id: {row['file_id']}, "
+                f"error: {str(e)}"
+            )
+    return written
+
+
+def build_metadata_row(file_id: UUID, metadata: dict) -> dict:
+    """
+    A file_metadata row with every metadata column set, since multi-row
+    inserts need the same keys in each row. Strings lose the NULs Postgres
+    rejects and are cut to the length of their column.
+    """
+    row = {column: metadata.get(column) for column in METADATA_COLUMNS}
+    for column, length in STRING_COLUMN_LENGTHS.items():
+        if row[column] is not None:
+            row[column] = str(row[column]).replace("\x00", "")[:length]
+    return {**row, "id": uuid.uuid4(), "file_id": file_id}
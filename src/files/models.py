@@ -1,10 +1,20 @@
-from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import Enum as SQLEnum
 
 from src.database import Base
-from src.files.constants import FileType, Visibility
+from src.files.constants import SEARCH_TEXT_CONFIG, FileType, Visibility
 
 
 class File(Base):
@@ -18,11 +28,58 @@ class File(Base):
     file_type = Column(SQLEnum(FileType), nullable=False)
     visibility = Column(SQLEnum(Visibility), nullable=False)
     file_size = Column(BigInteger, nullable=False)  # Size in bytes
-    s3_key = Column(String(255), nullable=False, unique=True)
+    s3_key = Column(String(255), nullable=False, index=True)
+    # ETag of the S3 object; recorded at upload or on the first download
+    etag = Column(String(64), nullable=True)
+    # Deduplicated uploads share a blob; files without one own their object
+    blob_id = Column(
+        UUID(as_uuid=True), ForeignKey("file_blobs.id"), nullable=True, index=True
+    )
     download_count = Column(Integer, default=0, nullable=False)
+    deleted_at = Column(DateTime, nullable=True)  # Set until the file is purged
 
     owner = relationship("User", back_populates="files")
     department = relationship("Department")
+    blob = relationship("FileBlob", back_populates="files")
+
+    __table_args__ = (
+        Index("files_created_at_id_idx", "created_at", "id"),
+        Index(
+            "files_deleted_at_idx",
+            "deleted_at",
+            postgresql_where=deleted_at.isnot(None),
+        ),
+        # Access paths of the role predicates in filter_accessible_files
+        Index(
+            "files_owner_id_created_at_idx",
+            "owner_id",
+            "created_at",
+            "id",
+            postgresql_where=deleted_at.is_(None),
+        ),
+        Index(
+            "files_department_id_created_at_idx",
+            "department_id",
+            "created_at",
+            "id",
+            postgresql_where=deleted_at.is_(None),
+        ),
+        Index(
+            "files_public_created_at_idx",
+            "created_at",
+            "id",
+            postgresql_where=(visibility == Visibility.PUBLIC) & deleted_at.is_(None),
+        ),
+        # The DEPARTMENT arm of downloadable_arms, per department
+        Index(
+            "files_department_visibility_created_at_idx",
+            "department_id",
+            "created_at",
+            "id",
+            postgresql_where=(visibility == Visibility.DEPARTMENT)
+            & deleted_at.is_(None),
+        ),
+    )
     file_metadata = relationship("FileMetadata", uselist=False, back_populates="file")
 
 
@@ -39,5 +96,64 @@ class FileMetadata(Base):
     author = Column(String(255), nullable=True)
     creation_date = Column(String(50), nullable=True)
     creator = Column(String(255), nullable=True)  # For PDF
+    # Document text for search, capped at SEARCH_TEXT_MAX_CHARS
+    content_text = Column(Text, nullable=True)
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(title, '')), 'A')"
+            f" || setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', "
+            "coalesce(content_text, '')), 'B')",
+            persisted=True,
+        ),
+    )
 
     file = relationship("File", back_populates="file_metadata")
+
+    __table_args__ = (
+        Index(
+            "file_metadata_search_vector_idx",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
+
+
+class FileBlob(Base):
+    __tablename__ = "file_blobs"
+
+    sha256 = Column(String(64), nullable=False, unique=True)
+    s3_key = Column(String(255), nullable=False, unique=True)
+    file_size = Column(BigInteger, nullable=False)  # Size in bytes
+    ref_count = Column(Integer, default=1, nullable=False)
+
+    files = relationship("File", back_populates="blob")
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    department_id = Column(
+        UUID(as_uuid=True), ForeignKey("departments.id"), nullable=False
+    )
+    filename = Column(String(255), nullable=False)
+    file_type = Column(SQLEnum(FileType), nullable=False)
+    visibility = Column(SQLEnum(Visibility), nullable=False)
+    file_size = Column(BigInteger, nullable=False)  # Declared size in bytes
+    part_size = Column(Integer, nullable=False)  # Every part but the last one
+    s3_key = Column(String(255), nullable=False)
+    upload_id = Column(String(1024), nullable=False)  # S3 multipart upload ID
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Set once the session is completed into a file; purging the file drops it
+    file_id = Column(
+        UUID(as_uuid=True), ForeignKey("files.id", ondelete="CASCADE"), nullable=True
+    )
+
+
+class DownloadCountSnapshot(Base):
+    __tablename__ = "download_count_snapshots"
+
+    # A Redis snapshot already added to files.download_count; flushing it
+    # again, e.g. after it was adopted, is skipped
+    snapshot_id = Column(String(64), nullable=False, unique=True)
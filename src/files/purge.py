@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import Integer, column, delete, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.database import engine, execute, fetch_all
+from src.files.constants import S3_DELETE_BATCH_SIZE, UPLOAD_SESSION_CLEANUP_BATCH_SIZE
+from src.files.models import File, FileBlob, FileMetadata, UploadSession
+from src.files.s3 import abort_multipart_upload, delete_many_from_s3
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_deleted_files(batch_size: int = S3_DELETE_BATCH_SIZE) -> int:
+    """Permanently remove soft-deleted files in batches; returns the count."""
+    purged = 0
+    while True:
+        batch_count = await purge_batch(batch_size)
+        purged += batch_count
+        if batch_count < batch_size:
+            return purged
+
+
+async def purge_batch(batch_size: int) -> int:
+    """
+    Remove one batch of soft-deleted files, their metadata and S3 objects.
+
+    Rows are locked with SKIP LOCKED, so concurrent purges take disjoint batches.
+    S3 objects are deleted before the commit; a failed S3 request rolls the
+    batch back and it is retried on the next run.
+    """
+    async with engine.begin() as connection:
+        files = await fetch_all(
+            select(File.id, File.s3_key, File.blob_id)
+            .where(File.deleted_at.isnot(None))
+            .limit(batch_size)
+            .with_for_update(skip_locked=True),
+            connection,
+        )
+        if not files:
+            return 0
+
+        file_ids = [file["id"] for file in files]
+        await execute(
+            delete(FileMetadata).where(FileMetadata.file_id.in_(file_ids)), connection
+        )
+        await execute(delete(File).where(File.id.in_(file_ids)), connection)
+
+        s3_keys = [file["s3_key"] for file in files if not file["blob_id"]]
+        released = Counter(file["blob_id"] for file in files if file["blob_id"])
+        if released:
+            s3_keys.extend(await release_blobs(released, connection))
+
+        await delete_many_from_s3(s3_keys)
+
+    logger.info(f"Purged {len(files)} files and {len(s3_keys)} S3 objects")
+    return len(files)
+
+
+async def release_blobs(released: Counter, connection) -> list[str]:
+    """
+    Drop blob references in one UPDATE and delete blobs nobody references.
+    Returns the S3 keys of the deleted blobs.
+    """
+    released_refs = values(
+        column("id", UUID(as_uuid=True)), column("refs", Integer), name="released"
+    ).data(list(released.items()))
+    blobs = await fetch_all(
+        update(FileBlob)
+        .where(FileBlob.id == released_refs.c.id)
+        .values(ref_count=FileBlob.ref_count - released_refs.c.refs)
+        .returning(FileBlob.id, FileBlob.ref_count, FileBlob.s3_key),
+        connection,
+    )
+    orphaned = [blob for blob in blobs if blob["ref_count"] <= 0]
+    if orphaned:
+        await execute(
+            delete(FileBlob).where(FileBlob.id.in_([blob["id"] for blob in orphaned])),
+            connection,
+        )
+    return [blob["s3_key"] for blob in orphaned]
+
+
+async def purge_expired_upload_sessions(
+    batch_size: int = UPLOAD_SESSION_CLEANUP_BATCH_SIZE,
+) -> int:
+    """Remove expired upload sessions in batches; returns the count."""
+    purged = 0
+    while True:
+        batch_count = await purge_upload_session_batch(batch_size)
+        purged += batch_count
+        if batch_count < batch_size:
+            return purged
+
+
+async def purge_upload_session_batch(batch_size: int) -> int:
+    """
+    Remove one batch of expired upload sessions.
+
+    Sessions that never completed have their multipart upload aborted and any
+    object an interrupted completion left behind deleted; completed sessions
+    only lose their row, the file keeps the object. Rows are locked with SKIP
+    LOCKED, so a session being completed right now is left for the next run.
+    """
+    async with engine.begin() as connection:
+        sessions = await fetch_all(
+            select(
+                UploadSession.id,
+                UploadSession.s3_key,
+                UploadSession.upload_id,
+                UploadSession.file_id,
+            )
+            .where(UploadSession.expires_at < datetime.utcnow())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True),
+            connection,
+        )
+        if not sessions:
+            return 0
+
+        await execute(
+            delete(UploadSession).where(
+                UploadSession.id.in_([session["id"] for session in sessions])
+            ),
+            connection,
+        )
+        abandoned = [session for session in sessions if not session["file_id"]]
+        await asyncio.gather(
+            *(
+                abort_multipart_upload(session["s3_key"], session["upload_id"])
+                for session in abandoned
+            )
+        )
+        await delete_many_from_s3([session["s3_key"] for session in abandoned])
+
+    logger.info(
+        f"Purged {len(sessions)} expired upload sessions, "
+        f"{len(abandoned)} multipart uploads aborted"
+    )
+    return len(sessions)
@@ -1,20 +1,67 @@
-from io import BytesIO
-from urllib import parse
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Query, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
 
 from src.auth.dependencies import get_current_user
-from src.files.constants import Visibility
-from src.files.schemas import FileResponse, FileUploadRequest
+from src.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.files.constants import (
+    DOWNLOAD_CACHE_CONTROL,
+    FILE_INFO_CACHE_CONTROL,
+    SEARCH_DEFAULT_RESULTS,
+    SEARCH_MAX_RESULTS,
+    Visibility,
+)
+from src.files.schemas import (
+    BatchUploadResult,
+    FileBulkDeleteRequest,
+    FileBulkDeleteResponse,
+    FileResponse,
+    FileSearchResult,
+    FileUploadRequest,
+    FileZipRequest,
+    UploadChunkResponse,
+    UploadCompleteRequest,
+    UploadInitiateRequest,
+    UploadInitiateResponse,
+    UploadSessionResponse,
+)
 from src.files.service import (
+    abort_upload_session,
+    complete_upload,
+    complete_upload_session,
+    create_upload_session,
     delete_file,
+    delete_files,
     download_file,
+    download_files_zip,
     get_file,
+    get_upload_session_status,
+    initiate_upload,
     list_files,
+    search_files,
     upload_file,
+    upload_files,
+    upload_session_chunk,
 )
+from src.files.utils import (
+    build_content_disposition,
+    build_file_etag,
+    build_file_page_content,
+    format_http_date,
+    is_not_modified,
+)
+from src.schemas import Page
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -33,26 +80,227 @@ async def upload_file_endpoint(
     return FileResponse(**file_record)
 
 
+@router.post("/upload/batch", response_model=list[BatchUploadResult])
+async def upload_files_endpoint(
+    files: list[UploadFile] = File(...),
+    visibility: Visibility = Query(
+        ..., description="Visibility: PRIVATE, DEPARTMENT, or PUBLIC"
+    ),
+    current_user: dict = Depends(get_current_user),
+):
+    """Upload many files in one request and report the outcome of each one."""
+    upload_request = FileUploadRequest(visibility=visibility)
+    results = await upload_files(files, upload_request.visibility, current_user)
+    return [BatchUploadResult(**result) for result in results]
+
+
+@router.post("/upload/initiate", response_model=UploadInitiateResponse)
+async def initiate_upload_endpoint(
+    upload_request: UploadInitiateRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Validate an upload and return presigned S3 URLs for uploading it directly.
+    Files larger than one part get a multipart upload with one URL per part.
+    """
+    upload = await initiate_upload(
+        upload_request.filename,
+        upload_request.file_size,
+        upload_request.visibility,
+        current_user,
+    )
+    return UploadInitiateResponse(**upload)
+
+
+@router.post("/upload/complete", response_model=FileResponse)
+async def complete_upload_endpoint(
+    complete_request: UploadCompleteRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Register a file uploaded directly to S3 and trigger metadata extraction."""
+    parts = [
+        {"PartNumber": part.part_number, "ETag": part.etag}
+        for part in complete_request.parts
+    ]
+    file_record = await complete_upload(
+        complete_request.upload_token, parts, current_user
+    )
+    return FileResponse(**file_record)
+
+
+@router.post("/uploads", response_model=UploadSessionResponse)
+async def create_upload_session_endpoint(
+    upload_request: UploadInitiateRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Open a resumable upload session. Send the file as `part_size` chunks to
+    /uploads/{session_id}/chunks, in any order, then complete the session.
+    """
+    session = await create_upload_session(
+        upload_request.filename,
+        upload_request.file_size,
+        upload_request.visibility,
+        current_user,
+    )
+    return UploadSessionResponse(**session)
+
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session_endpoint(
+    session_id: UUID, current_user: dict = Depends(get_current_user)
+):
+    """Report the offset and the missing parts of an upload session to resume it."""
+    session = await get_upload_session_status(session_id, current_user)
+    return UploadSessionResponse(**session)
+
+
+@router.put("/uploads/{session_id}/chunks", response_model=UploadChunkResponse)
+async def upload_chunk_endpoint(
+    session_id: UUID,
+    request: Request,
+    offset: int = Query(
+        ..., ge=0, description="Byte offset of the chunk, a multiple of part_size"
+    ),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Upload the raw bytes of one chunk. Every chunk is `part_size` bytes except
+    the last one; resending a chunk replaces it.
+    """
+    chunk = await upload_session_chunk(
+        session_id, offset, request.stream(), current_user
+    )
+    return UploadChunkResponse(**chunk)
+
+
+@router.post("/uploads/{session_id}/complete", response_model=FileResponse)
+async def complete_upload_session_endpoint(
+    session_id: UUID, current_user: dict = Depends(get_current_user)
+):
+    """Assemble the uploaded chunks into a file and trigger metadata extraction."""
+    file_record = await complete_upload_session(session_id, current_user)
+    return FileResponse(**file_record)
+
+
+@router.delete("/uploads/{session_id}")
+async def abort_upload_session_endpoint(
+    session_id: UUID, current_user: dict = Depends(get_current_user)
+):
+    """Abort an incomplete upload session and discard its chunks."""
+    await abort_upload_session(session_id, current_user)
+    return {"message": "Upload session aborted"}
+
+
+@router.get("/search", response_model=list[FileSearchResult])
+async def search_files_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    department_id: UUID | None = Query(
+        None, description="Optional department ID to filter files"
+    ),
+    limit: int = Query(SEARCH_DEFAULT_RESULTS, ge=1, le=SEARCH_MAX_RESULTS),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Search the text and titles of accessible PDF and DOCX files. Supports
+    quoted phrases, `or` and `-word`; results come best match first with a
+    highlighted excerpt.
+    """
+    results = await search_files(q, department_id, current_user, limit)
+    return [FileSearchResult(**result) for result in results]
+
+
 @router.get("/{file_id}", response_model=FileResponse)
-async def get_file_info(file_id: UUID, current_user: dict = Depends(get_current_user)):
-    """Get file details and metadata with access checks."""
+async def get_file_info(
+    file_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+    if_modified_since: str | None = Header(None, alias="If-Modified-Since"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Get file details and metadata with access checks. Send the ETag back in
+    If-None-Match to poll for metadata extraction cheaply.
+    """
     file = await get_file(file_id, current_user)
+    last_modified = file["updated_at"]
+    if file["file_metadata"]:
+        last_modified = max(last_modified, file["file_metadata"]["updated_at"])
+    headers = {
+        "ETag": build_file_etag(file),
+        "Last-Modified": format_http_date(last_modified),
+        "Cache-Control": FILE_INFO_CACHE_CONTROL,
+    }
+    if is_not_modified(
+        headers["ETag"], last_modified, if_none_match, if_modified_since
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
     return FileResponse(**file)
 
 
-@router.get("/{file_id}/download", response_class=StreamingResponse)
+@router.get(
+    "/{file_id}/download",
+    response_class=StreamingResponse,
+    responses={status.HTTP_307_TEMPORARY_REDIRECT: {"description": "Presigned URL"}},
+)
 async def download_file_endpoint(
-    file_id: UUID, current_user: dict = Depends(get_current_user)
+    file_id: UUID,
+    redirect: bool = Query(
+        False, description="Redirect to a short-lived presigned S3 URL"
+    ),
+    range_header: str | None = Header(None, alias="Range"),
+    if_range: str | None = Header(None, alias="If-Range"),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+    if_modified_since: str | None = Header(None, alias="If-Modified-Since"),
+    current_user: dict = Depends(get_current_user),
 ):
-    """Download a file from S3 with access checks."""
-    file_content, filename = await download_file(file_id, current_user)
-    # URL-encode the filename to handle non-ASCII characters
-    encoded_filename = parse.quote(filename)
+    """
+    Download a file with access checks. Streams from S3 with HTTP Range support,
+    or redirects to a presigned S3 URL for large files or when requested.
+    Unchanged files get 304 Not Modified without an S3 request.
+    """
+    download = await download_file(
+        file_id,
+        current_user,
+        range_header,
+        if_range,
+        redirect,
+        if_none_match,
+        if_modified_since,
+    )
     headers = {
-        "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
+        "Last-Modified": format_http_date(download["last_modified"]),
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL[download["visibility"]],
     }
+    if download["etag"]:
+        headers["ETag"] = download["etag"]
+    if download["not_modified"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if download["redirect_url"]:
+        return RedirectResponse(
+            download["redirect_url"], status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        )
+
+    s3_object = download["stream"]
+    headers.update(
+        {
+            "Content-Disposition": build_content_disposition(download["filename"]),
+            "Content-Length": str(s3_object["content_length"]),
+            "Accept-Ranges": "bytes",
+        }
+    )
+    if s3_object["content_range"]:
+        headers["Content-Range"] = s3_object["content_range"]
+
     return StreamingResponse(
-        BytesIO(file_content),
+        s3_object["body"],
+        status_code=(
+            status.HTTP_206_PARTIAL_CONTENT
+            if s3_object["content_range"]
+            else status.HTTP_200_OK
+        ),
         media_type="application/octet-stream",
         headers=headers,
     )
@@ -67,13 +315,56 @@ async def delete_file_endpoint(
     return {"message": "File deleted"}
 
 
-@router.get("/", response_model=list[FileResponse])
+@router.post(
+    "/download/zip",
+    response_class=StreamingResponse,
+    responses={status.HTTP_200_OK: {"content": {"application/zip": {}}}},
+)
+async def download_files_zip_endpoint(
+    zip_request: FileZipRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Download many files, listed by id or all the accessible files of a
+    department, as one ZIP archive streamed while it is built.
+    """
+    body = await download_files_zip(
+        zip_request.file_ids, zip_request.department_id, current_user
+    )
+    return StreamingResponse(
+        body,
+        media_type="application/zip",
+        headers={"Content-Disposition": build_content_disposition("files.zip")},
+    )
+
+
+@router.post("/bulk-delete", response_model=FileBulkDeleteResponse)
+async def delete_files_endpoint(
+    delete_request: FileBulkDeleteRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Mark many files deleted at once. Files are removed from S3 and the database
+    in the background; ids the user may not delete are reported as failed.
+    """
+    result = await delete_files(delete_request.file_ids, current_user)
+    return FileBulkDeleteResponse(**result)
+
+
+@router.get("/", response_model=Page[FileResponse])
 async def list_files_endpoint(
     department_id: UUID | None = Query(
         None, description="Optional department ID to filter files"
     ),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: dict = Depends(get_current_user),
 ):
-    """List files accessible to the user, optionally filtered by department."""
-    files = await list_files(department_id, current_user)
-    return [FileResponse(**f) for f in files]
+    """
+    List files accessible to the user, newest first, optionally filtered by
+    department. Pass `next_cursor` back as `cursor` to get the next page.
+    """
+    page = await list_files(department_id, current_user, cursor, limit)
+    # Skips validating the rows into FileResponse models; the wire format and
+    # the documented schema stay those of the response model
+    return ORJSONResponse(build_file_page_content(page))
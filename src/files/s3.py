@@ -1,32 +1,183 @@
-from contextlib import asynccontextmanager
+import asyncio
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from functools import partial
+from typing import AsyncIterator
 
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
 
 from src.config import settings
-from src.files.exceptions import FileNotFound
+from src.files.constants import (
+    S3_DELETE_BATCH_SIZE,
+    S3_DOWNLOAD_CHUNK_SIZE,
+    S3_MULTIPART_CHUNK_SIZE,
+    S3_MULTIPART_MAX_CONCURRENCY,
+)
+from src.files.exceptions import FileNotFound, UploadIncomplete
 
+_shared_client = None
+_shared_client_stack: AsyncExitStack | None = None
 
-@asynccontextmanager
-async def get_s3_client():
-    """Create an async S3 client for MinIO."""
+
+def _create_s3_client():
+    """Create an async S3 client for MinIO with a keep-alive connection pool."""
     session = get_session()
-    async with session.create_client(
+    return session.create_client(
         "s3",
         endpoint_url=settings.AWS_S3_ENDPOINT_URL,
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
+        config=AioConfig(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            connector_args={"keepalive_timeout": settings.S3_KEEPALIVE_TIMEOUT},
+        ),
+    )
+
+
+async def open_s3_client() -> None:
+    """Create the S3 client shared by every request of this worker process."""
+    global _shared_client, _shared_client_stack
+    if _shared_client is not None:
+        return
+
+    stack = AsyncExitStack()
+    _shared_client = await stack.enter_async_context(_create_s3_client())
+    _shared_client_stack = stack
+
+
+async def close_s3_client() -> None:
+    """Close the shared S3 client and its connection pool."""
+    global _shared_client, _shared_client_stack
+    if _shared_client_stack is None:
+        return
+
+    stack = _shared_client_stack
+    _shared_client, _shared_client_stack = None, None
+    await stack.aclose()
+
+
+@asynccontextmanager
+async def get_s3_client():
+    """
+    Yield the shared S3 client, or a short-lived one when it is not open
+    (e.g. in Celery workers and scripts).
+    """
+    if _shared_client is not None:
+        yield _shared_client
+        return
+
+    async with _create_s3_client() as client:
         yield client
 
 
-async def upload_to_s3(file_content: bytes, s3_key: str) -> None:
-    """Upload a file to S3."""
+async def upload_to_s3(file_content: bytes, s3_key: str) -> str:
+    """Upload a file to S3 and return the object's ETag."""
     async with get_s3_client() as client:
-        await client.put_object(
+        response = await client.put_object(
             Bucket=settings.AWS_S3_BUCKET_NAME,
             Key=s3_key,
             Body=file_content,
         )
+    return response["ETag"]
+
+
+async def upload_stream_to_s3(file: UploadFile, s3_key: str) -> tuple[int, str]:
+    """
+    Stream a file to S3 in fixed-size chunks and return the number of bytes sent
+    and the object's ETag.
+
+    Files smaller than one chunk are sent with a single put_object. Larger files
+    go through a multipart upload with at most S3_MULTIPART_MAX_CONCURRENCY parts
+    in flight, so memory per upload never exceeds a few chunks.
+    """
+    chunk = await _read_chunk(file, S3_MULTIPART_CHUNK_SIZE)
+    if len(chunk) < S3_MULTIPART_CHUNK_SIZE:
+        return len(chunk), await upload_to_s3(chunk, s3_key)
+
+    async with get_s3_client() as client:
+        multipart = await client.create_multipart_upload(
+            Bucket=settings.AWS_S3_BUCKET_NAME,
+            Key=s3_key,
+        )
+        upload_id = multipart["UploadId"]
+        parts: list[dict] = []
+        in_flight: set[asyncio.Task] = set()
+        total_size = 0
+        part_number = 1
+        try:
+            while chunk:
+                if len(in_flight) >= S3_MULTIPART_MAX_CONCURRENCY:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    parts.extend(task.result() for task in done)
+
+                in_flight.add(
+                    asyncio.create_task(
+                        _upload_part(client, s3_key, upload_id, part_number, chunk)
+                    )
+                )
+                total_size += len(chunk)
+                part_number += 1
+                chunk = await _read_chunk(file, S3_MULTIPART_CHUNK_SIZE)
+
+            if in_flight:
+                done, in_flight = await asyncio.wait(in_flight)
+                parts.extend(task.result() for task in done)
+
+            completed = await client.complete_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": sorted(parts, key=lambda part: part["PartNumber"])
+                },
+            )
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            await client.abort_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Key=s3_key,
+                UploadId=upload_id,
+            )
+            raise
+
+    return total_size, completed["ETag"]
+
+
+async def _upload_part(
+    client, s3_key: str, upload_id: str, part_number: int, body: bytes
+) -> dict:
+    response = await client.upload_part(
+        Bucket=settings.AWS_S3_BUCKET_NAME,
+        Key=s3_key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body,
+    )
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+
+async def _read_chunk(file: UploadFile, size: int) -> bytes:
+    """Read exactly `size` bytes unless the end of the file is reached first."""
+    data = await file.read(size)
+    if len(data) == size or not data:
+        return data
+
+    buffer = bytearray(data)
+    while len(buffer) < size:
+        data = await file.read(size - len(buffer))
+        if not data:
+            break
+        buffer.extend(data)
+    return bytes(buffer)
 
 
 async def download_from_s3(s3_key: str) -> bytes:
@@ -42,6 +193,327 @@ async def download_from_s3(s3_key: str) -> bytes:
         raise FileNotFound()
 
 
+async def read_s3_range(s3_key: str, byte_range: str) -> tuple[bytes, int]:
+    """
+    Read part of an object with a Range such as "bytes=0-1023" or "bytes=-1024".
+    Returns the bytes and the size of the whole object.
+    """
+    try:
+        async with get_s3_client() as client:
+            response = await client.get_object(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Key=s3_key,
+                Range=byte_range,
+            )
+            data = await response["Body"].read()
+    except client.exceptions.NoSuchKey:
+        raise FileNotFound()
+
+    content_range = response.get("ContentRange")  # "bytes 0-1023/4096"
+    object_size = int(content_range.rsplit("/", 1)[1]) if content_range else len(data)
+    return data, object_size
+
+
+async def stream_from_s3(
+    s3_key: str,
+    byte_range: tuple[int, int] | None = None,
+    if_range: str | None = None,
+    if_none_match: str | None = None,
+) -> dict | None:
+    """
+    Open an S3 object for streaming, optionally limited to an inclusive byte range.
+
+    `if_range` carries the client's If-Range validator. It is forwarded as an S3
+    precondition, and the whole object is returned when it no longer matches.
+    `if_none_match` is forwarded as is; None is returned when S3 answers that
+    the object is not modified.
+    The returned body iterator keeps the S3 connection open until it is exhausted;
+    `close` releases it instead when the body will not be iterated.
+    """
+    stack = AsyncExitStack()
+    client = await stack.enter_async_context(get_s3_client())
+    params = {"Bucket": settings.AWS_S3_BUCKET_NAME, "Key": s3_key}
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    try:
+        try:
+            response = await client.get_object(
+                **params, **_range_params(byte_range, if_range)
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "PreconditionFailed":
+                raise
+            response = await client.get_object(**params)
+    except client.exceptions.NoSuchKey:
+        await stack.aclose()
+        raise FileNotFound()
+    except ClientError as e:
+        await stack.aclose()
+        if e.response["Error"]["Code"] == "304":
+            return None
+        raise
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    return {
+        "body": _iter_body(response["Body"], stack),
+        "close": partial(_close_body, response["Body"], stack),
+        "content_length": response["ContentLength"],
+        "content_range": response.get("ContentRange"),
+        "etag": response.get("ETag"),
+        "last_modified": response.get("LastModified"),
+    }
+
+
+async def stream_many_from_s3(
+    s3_keys: list[str], concurrency: int, buffer_chunks: int
+) -> AsyncIterator[AsyncIterator[bytes]]:
+    """
+    Yield a body iterator per key, in order, while up to `concurrency` objects
+    are fetched ahead into buffers of at most `buffer_chunks` chunks each.
+
+    The body of a missing object raises FileNotFound. Closing the iteration
+    cancels the prefetches and releases their connections.
+    """
+
+    async def fetch(s3_key: str, buffer: asyncio.Queue) -> None:
+        try:
+            s3_object = await stream_from_s3(s3_key)
+            body = s3_object["body"]
+            try:
+                async for chunk in body:
+                    await buffer.put(chunk)
+            finally:
+                await body.aclose()
+        except Exception as e:
+            await buffer.put(e)
+        else:
+            await buffer.put(None)
+
+    async def drain(buffer: asyncio.Queue) -> AsyncIterator[bytes]:
+        while (item := await buffer.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    keys = iter(s3_keys)
+    prefetches = deque()
+
+    def prefetch_next() -> None:
+        s3_key = next(keys, None)
+        if s3_key is not None:
+            buffer = asyncio.Queue(maxsize=buffer_chunks)
+            prefetches.append((asyncio.create_task(fetch(s3_key, buffer)), buffer))
+
+    try:
+        for _ in range(concurrency):
+            prefetch_next()
+        while prefetches:
+            task, buffer = prefetches[0]
+            yield drain(buffer)
+            # Stop the fetch if the consumer left its body unfinished
+            task.cancel()
+            prefetches.popleft()
+            prefetch_next()
+    finally:
+        for task, _ in prefetches:
+            task.cancel()
+
+
+def _range_params(byte_range: tuple[int, int] | None, if_range: str | None) -> dict:
+    if not byte_range:
+        return {}
+
+    params = {"Range": f"bytes={byte_range[0]}-{byte_range[1]}"}
+    if not if_range:
+        return params
+
+    if if_range.startswith('"'):
+        params["IfMatch"] = if_range
+        return params
+
+    # Weak ETags never match If-Range and unparseable dates are ignored,
+    # so the whole object is sent.
+    try:
+        params["IfUnmodifiedSince"] = parsedate_to_datetime(if_range)
+    except (TypeError, ValueError):
+        return {}
+    return params
+
+
+async def _iter_body(body, stack: AsyncExitStack) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in body.iter_chunks(S3_DOWNLOAD_CHUNK_SIZE):
+            yield chunk
+    finally:
+        await _close_body(body, stack)
+
+
+async def _close_body(body, stack: AsyncExitStack) -> None:
+    body.close()
+    await stack.aclose()
+
+
+async def head_s3_object(s3_key: str) -> dict | None:
+    """Return the object's HEAD response, or None if it does not exist."""
+    async with get_s3_client() as client:
+        try:
+            return await client.head_object(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Key=s3_key,
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+
+
+async def generate_presigned_put_url(s3_key: str) -> str:
+    """Create a presigned URL the client can PUT the whole object to."""
+    async with get_s3_client() as client:
+        return await client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": settings.AWS_S3_BUCKET_NAME, "Key": s3_key},
+            ExpiresIn=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS,
+        )
+
+
+async def generate_presigned_get_url(s3_key: str, content_disposition: str) -> str:
+    """Create a short-lived presigned GET URL that overrides Content-Disposition."""
+    async with get_s3_client() as client:
+        return await client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": settings.AWS_S3_BUCKET_NAME,
+                "Key": s3_key,
+                "ResponseContentDisposition": content_disposition,
+            },
+            ExpiresIn=settings.DOWNLOAD_URL_EXPIRE_SECONDS,
+        )
+
+
+async def create_presigned_multipart_upload(
+    s3_key: str, part_count: int
+) -> tuple[str, list[str]]:
+    """Start a multipart upload and presign a PUT URL for each of its parts."""
+    async with get_s3_client() as client:
+        multipart = await client.create_multipart_upload(
+            Bucket=settings.AWS_S3_BUCKET_NAME,
+            Key=s3_key,
+        )
+        upload_id = multipart["UploadId"]
+        part_urls = [
+            await client.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": settings.AWS_S3_BUCKET_NAME,
+                    "Key": s3_key,
+                    "UploadId": upload_id,
+                    "PartNumber": part_number,
+                },
+                ExpiresIn=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS,
+            )
+            for part_number in range(1, part_count + 1)
+        ]
+    return upload_id, part_urls
+
+
+async def complete_multipart_upload(
+    s3_key: str, upload_id: str, parts: list[dict]
+) -> str:
+    """
+    Assemble the uploaded parts of a multipart upload into the final object
+    and return its ETag.
+    """
+    async with get_s3_client() as client:
+        try:
+            response = await client.complete_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": sorted(parts, key=lambda part: part["PartNumber"])
+                },
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in (
+                "InvalidPart",
+                "InvalidPartOrder",
+                "NoSuchUpload",
+                "EntityTooSmall",
+            ):
+                raise UploadIncomplete(detail="Uploaded parts could not be assembled")
+            raise
+    return response["ETag"]
+
+
+async def create_multipart_upload(s3_key: str) -> str:
+    """Start a multipart upload and return its upload ID."""
+    async with get_s3_client() as client:
+        multipart = await client.create_multipart_upload(
+            Bucket=settings.AWS_S3_BUCKET_NAME,
+            Key=s3_key,
+        )
+    return multipart["UploadId"]
+
+
+async def upload_part_to_s3(
+    s3_key: str, upload_id: str, part_number: int, body: bytes
+) -> dict:
+    """
+    Upload one part of a multipart upload; uploading a part number again
+    replaces the earlier part. Raises UploadIncomplete when the upload was
+    already completed or aborted.
+    """
+    async with get_s3_client() as client:
+        try:
+            return await _upload_part(client, s3_key, upload_id, part_number, body)
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "NoSuchUpload":
+                raise UploadIncomplete(detail="Multipart upload no longer exists")
+            raise
+
+
+async def list_multipart_parts(s3_key: str, upload_id: str) -> list[dict] | None:
+    """
+    Return the parts uploaded so far (PartNumber, Size and ETag), or None if
+    the multipart upload no longer exists.
+    """
+    parts = []
+    async with get_s3_client() as client:
+        params = {
+            "Bucket": settings.AWS_S3_BUCKET_NAME,
+            "Key": s3_key,
+            "UploadId": upload_id,
+        }
+        while True:
+            try:
+                response = await client.list_parts(**params)
+            except ClientError as e:
+                if e.response["Error"]["Code"] == "NoSuchUpload":
+                    return None
+                raise
+            parts.extend(response.get("Parts", []))
+            if not response.get("IsTruncated"):
+                return parts
+            params["PartNumberMarker"] = response["NextPartNumberMarker"]
+
+
+async def abort_multipart_upload(s3_key: str, upload_id: str) -> None:
+    """Abort a multipart upload and drop its parts; a missing upload is ignored."""
+    async with get_s3_client() as client:
+        try:
+            await client.abort_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Key=s3_key,
+                UploadId=upload_id,
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchUpload":
+                raise
+
+
 async def delete_from_s3(s3_key: str) -> None:
     """Delete a file from S3."""
     async with get_s3_client() as client:
@@ -49,3 +521,16 @@ async def delete_from_s3(s3_key: str) -> None:
             Bucket=settings.AWS_S3_BUCKET_NAME,
             Key=s3_key,
         )
+
+
+async def delete_many_from_s3(s3_keys: list[str]) -> None:
+    """Delete files from S3 with DeleteObjects, up to 1000 keys per request."""
+    async with get_s3_client() as client:
+        for start in range(0, len(s3_keys), S3_DELETE_BATCH_SIZE):
+            batch = s3_keys[start : start + S3_DELETE_BATCH_SIZE]
+            response = await client.delete_objects(
+                Bucket=settings.AWS_S3_BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            if response.get("Errors"):
+                raise RuntimeError(f"S3 DeleteObjects failed: {response['Errors']}")
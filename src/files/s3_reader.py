@@ -0,0 +1,120 @@
+import asyncio
+import io
+from collections import OrderedDict
+
+from src.files.constants import S3_RANGE_READ_BLOCK_SIZE, S3_RANGE_READ_MAX_BLOCKS
+from src.files.s3 import read_s3_range
+
+
+class S3RangeReader(io.RawIOBase):
+    """
+    Seekable, read-only file object over an S3 object that fetches only the
+    blocks it is asked for, with ranged GETs on `loop`.
+
+    Must be used from a thread other than the one running `loop`, e.g. from
+    `loop.run_in_executor`. Adjacent missing blocks are fetched in one request
+    and the most recently used blocks are kept in memory.
+    """
+
+    def __init__(
+        self,
+        s3_key: str,
+        loop: asyncio.AbstractEventLoop,
+        block_size: int = S3_RANGE_READ_BLOCK_SIZE,
+        max_blocks: int = S3_RANGE_READ_MAX_BLOCKS,
+    ) -> None:
+        super().__init__()
+        self.s3_key = s3_key
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.bytes_fetched = 0
+        self.request_count = 0
+        self._loop = loop
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._position = 0
+
+        # Parsers start at the end of the file, so the first request reads the
+        # tail and learns the object size from its Content-Range.
+        tail, self.size = self._fetch(f"bytes=-{block_size}")
+        tail_start = self.size - len(tail)
+        first_block = -(-tail_start // block_size)  # first block fully in the tail
+        for index in range(first_block, self._block_count()):
+            offset = index * block_size - tail_start
+            self._store(index, tail[offset : offset + block_size])
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self.size)
+        if self._position >= end:
+            return 0
+
+        data = self._read(self._position, end)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def _read(self, start: int, end: int) -> bytes:
+        first, last = start // self.block_size, (end - 1) // self.block_size
+        if last - first >= self.max_blocks:
+            # Larger than the cache, e.g. read() to the end
+            data, _ = self._fetch(f"bytes={start}-{end - 1}")
+            return data
+
+        self._fetch_missing(first, last)
+        data = b"".join(self._blocks[index] for index in range(first, last + 1))
+        offset = first * self.block_size
+        return data[start - offset : end - offset]
+
+    def _fetch_missing(self, first: int, last: int) -> None:
+        index = first
+        while index <= last:
+            if index in self._blocks:
+                self._blocks.move_to_end(index)  # keep it while the range loads
+                index += 1
+                continue
+
+            run_end = index
+            while run_end + 1 <= last and run_end + 1 not in self._blocks:
+                run_end += 1
+            start = index * self.block_size
+            end = min((run_end + 1) * self.block_size, self.size) - 1
+            data, _ = self._fetch(f"bytes={start}-{end}")
+            for block in range(index, run_end + 1):
+                offset = (block - index) * self.block_size
+                self._store(block, data[offset : offset + self.block_size])
+            index = run_end + 1
+
+    def _fetch(self, byte_range: str) -> tuple[bytes, int]:
+        data, size = asyncio.run_coroutine_threadsafe(
+            read_s3_range(self.s3_key, byte_range), self._loop
+        ).result()
+        self.bytes_fetched += len(data)
+        self.request_count += 1
+        return data, size
+
+    def _store(self, index: int, data: bytes) -> None:
+        self._blocks[index] = data
+        self._blocks.move_to_end(index)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def _block_count(self) -> int:
+        return -(-self.size // self.block_size)
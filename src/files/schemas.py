@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import Field
+from pydantic import Field, model_validator
 
 from src.files.constants import FileType, Visibility
 from src.schemas import CustomModel
@@ -27,3 +27,81 @@ class FileResponse(CustomModel):
     created_at: datetime
     updated_at: datetime
     file_metadata: Optional[dict] = None
+
+
+class BatchUploadResult(CustomModel):
+    filename: str
+    file: FileResponse | None = None
+    error: str | None = None
+
+
+class FileSearchResult(CustomModel):
+    file: FileResponse
+    rank: float
+    headline: str
+
+
+class FileBulkDeleteRequest(CustomModel):
+    file_ids: list[UUID] = Field(..., min_length=1)
+
+
+class FileZipRequest(CustomModel):
+    file_ids: list[UUID] | None = Field(None, min_length=1)
+    department_id: UUID | None = None
+
+    @model_validator(mode="after")
+    def validate_one_selection(self) -> "FileZipRequest":
+        if (self.file_ids is None) == (self.department_id is None):
+            raise ValueError("Pass either file_ids or department_id")
+        return self
+
+
+class FileBulkDeleteResponse(CustomModel):
+    deleted: list[UUID]
+    failed: list[UUID]
+
+
+class UploadInitiateRequest(CustomModel):
+    filename: str = Field(..., min_length=1, max_length=200)
+    file_size: int = Field(..., gt=0, description="File size in bytes")
+    visibility: Visibility = Field(
+        ..., description="Visibility level: PRIVATE, DEPARTMENT, or PUBLIC"
+    )
+
+
+class UploadInitiateResponse(CustomModel):
+    upload_token: str
+    s3_key: str
+    url: str | None = None
+    upload_id: str | None = None
+    part_size: int | None = None
+    part_urls: list[str] = []
+
+
+class UploadPart(CustomModel):
+    part_number: int = Field(..., ge=1)
+    etag: str
+
+
+class UploadCompleteRequest(CustomModel):
+    upload_token: str
+    parts: list[UploadPart] = []
+
+
+class UploadSessionResponse(CustomModel):
+    id: UUID
+    filename: str
+    file_size: int
+    part_size: int
+    part_count: int
+    offset: int = Field(..., description="Bytes received without gaps from 0")
+    received_bytes: int
+    missing_parts: list[int]
+    expires_at: datetime
+    file_id: UUID | None = None
+
+
+class UploadChunkResponse(CustomModel):
+    part_number: int
+    offset: int
+    size: int
@@ -1,23 +1,108 @@
+import asyncio
 import logging
+import math
+import os
 import uuid
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from typing import AsyncIterator
 from uuid import UUID
 
 from fastapi import UploadFile
-from sqlalchemy import select, update
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Select,
+    delete,
+    func,
+    literal_column,
+    or_,
+    select,
+    true,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
 
-from src.database import execute, fetch_all, fetch_one
-from src.files.constants import FileType, Visibility
+from src.config import settings
+from src.constants import DEFAULT_PAGE_SIZE
+from src.database import engine, execute, fetch_all, fetch_one
+from src.exceptions import DetailedHTTPException
+from src.files.cache import (
+    build_page_key,
+    get_cached_file,
+    get_cached_page,
+    invalidate_file_pages,
+    invalidate_files,
+)
+from src.files.constants import (
+    BATCH_UPLOAD_MAX_CONCURRENCY,
+    BATCH_UPLOAD_MAX_FILES,
+    BULK_DELETE_MAX_FILES,
+    METADATA_PREFIX,
+    METADATA_SEARCH_COLUMNS,
+    S3_MULTIPART_CHUNK_SIZE,
+    SEARCH_DEFAULT_RESULTS,
+    SEARCH_HEADLINE_OPTIONS,
+    SEARCH_TEXT_CONFIG,
+    ZIP_DOWNLOAD_MAX_FILES,
+    ZIP_PREFETCH_CHUNKS,
+    ZIP_PREFETCH_FILES,
+    FileType,
+    Visibility,
+)
+from src.files.counters import get_pending_downloads, record_downloads
 from src.files.exceptions import (
     FileAccessDenied,
     FileNotFound,
     FileSizeExceeded,
+    InvalidChunk,
     InvalidFileType,
+    InvalidUploadToken,
     InvalidVisibility,
+    TooManyFiles,
+    UploadIncomplete,
+    UploadSessionCompleted,
+    UploadSessionExpired,
+    UploadSessionNotFound,
+)
+from src.files.extraction import queue_extractions
+from src.files.metadata import (
+    build_metadata_row,
+    can_extract_inline,
+    extract_inline_metadata,
 )
-from src.files.models import File, FileMetadata
-from src.files.s3 import delete_from_s3, download_from_s3, upload_to_s3
-from src.files.utils import get_file_type
-from src.tasks import extract_metadata
+from src.files.models import File, FileBlob, FileMetadata, UploadSession
+from src.files.s3 import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    create_presigned_multipart_upload,
+    delete_from_s3,
+    generate_presigned_get_url,
+    generate_presigned_put_url,
+    head_s3_object,
+    list_multipart_parts,
+    stream_from_s3,
+    stream_many_from_s3,
+    upload_part_to_s3,
+    upload_stream_to_s3,
+)
+from src.files.utils import (
+    build_content_disposition,
+    build_zip_entry_names,
+    compute_sha256,
+    create_upload_token,
+    decode_upload_token,
+    get_file_type,
+    is_not_modified,
+    parse_range_header,
+)
+from src.files.zipstream import ZipEntry, stream_zip
+from src.pagination import build_page, paginate
+from src.tasks import extract_pending_metadata, purge_deleted_files
 from src.users.constants import Role
 
 logger = logging.getLogger(__name__)
@@ -27,12 +112,19 @@ async def validate_file_upload(
     file: UploadFile, visibility: Visibility, current_user: dict
 ) -> tuple[str, FileType]:
     """Validate file size, type, and visibility based on user role."""
+    file_type = validate_upload(file.filename, file.size, visibility, current_user)
+    return file.filename, file_type
+
+
+def validate_upload(
+    filename: str, file_size: int, visibility: Visibility, current_user: dict
+) -> FileType:
+    """Validate a declared upload against the role's size, type and visibility."""
     role = Role(current_user["role"])
-    file_type = get_file_type(file.filename)
+    file_type = get_file_type(filename)
 
     max_size_mb = {Role.USER: 10, Role.MANAGER: 50, Role.ADMIN: 100}
     max_size_bytes = max_size_mb[role] * 1024 * 1024
-    file_size = file.size
     if file_size > max_size_bytes:
         raise FileSizeExceeded()
 
@@ -42,76 +134,959 @@ async def validate_file_upload(
     if role == Role.USER and visibility != Visibility.PRIVATE:
         raise InvalidVisibility(detail="Users can only upload private files")
 
-    return file.filename, file_type
+    return file_type
 
 
 async def upload_file(
     file: UploadFile, visibility: Visibility, current_user: dict
 ) -> dict:
-    """Upload a file to S3, save metadata, and trigger metadata extraction."""
+    """
+    Upload a file to S3, save metadata, and trigger metadata extraction.
+
+    Content is stored once per SHA-256 digest. A duplicate upload skips the S3
+    write and reuses the metadata already extracted for that content.
+    """
     filename, file_type = await validate_file_upload(file, visibility, current_user)
-    s3_key = f"files/{current_user['id']}/{uuid.uuid4().hex}/{filename}"
-    file_content = await file.read()  # Read the entire file content
-    await upload_to_s3(file_content, s3_key)
+    upload = {"file": file, "filename": filename, "file_type": file_type}
+    await store_uploads([upload])
+    if upload["error"]:
+        raise upload["error"]
 
-    file_data = {
-        "owner_id": current_user["id"],
-        "department_id": current_user["department_id"],
-        "filename": filename,
-        "file_type": file_type,
-        "visibility": visibility,
-        "file_size": len(file_content),
+    file_records = await register_uploads([upload], visibility, current_user)
+    return file_records[0]
+
+
+async def upload_files(
+    files: list[UploadFile], visibility: Visibility, current_user: dict
+) -> list[dict]:
+    """
+    Upload many files at once and report the outcome of each one.
+
+    Every file is validated before any S3 write. Valid files are stored
+    concurrently and registered with a single bulk insert.
+    """
+    if len(files) > BATCH_UPLOAD_MAX_FILES:
+        raise TooManyFiles()
+
+    results = []
+    uploads = []
+    for file in files:
+        result = {"filename": file.filename, "file": None, "error": None}
+        results.append(result)
+        try:
+            filename, file_type = await validate_file_upload(
+                file, visibility, current_user
+            )
+        except DetailedHTTPException as e:
+            result["error"] = e.detail
+            continue
+        uploads.append(
+            {
+                "file": file,
+                "filename": filename,
+                "file_type": file_type,
+                "result": result,
+            }
+        )
+    if not uploads:
+        return results
+
+    await store_uploads(uploads)
+    for upload in uploads:
+        if upload["error"]:
+            upload["result"]["error"] = "Upload to storage failed"
+
+    stored = [upload for upload in uploads if not upload["error"]]
+    file_records = await register_uploads(stored, visibility, current_user)
+    for upload, file_record in zip(stored, file_records):
+        upload["result"]["file"] = file_record
+    return results
+
+
+async def store_uploads(uploads: list[dict]) -> None:
+    """
+    Hash uploads and write the content that is not stored yet to S3.
+
+    Adds `sha256`, `file_size`, `s3_key`, `etag`, `uploaded`, `metadata` and
+    `error` to each upload; `etag` is only known for content written here. At
+    most BATCH_UPLOAD_MAX_CONCURRENCY uploads are written at the same time. New
+    content up to INLINE_METADATA_MAX_SIZE bytes gets its metadata parsed from
+    the spooled bytes once written.
+    """
+    for upload in uploads:
+        upload["sha256"], upload["file_size"] = await compute_sha256(upload["file"])
+        upload["s3_key"] = f"blobs/sha256/{upload['sha256'][:2]}/{upload['sha256']}"
+        upload["etag"] = None
+        upload["uploaded"] = False
+        upload["metadata"] = None
+        upload["error"] = None
+
+    stored_digests = {
+        blob["sha256"]
+        for blob in await fetch_all(
+            select(FileBlob.sha256).where(
+                FileBlob.sha256.in_({upload["sha256"] for upload in uploads})
+            )
+        )
+    }
+    semaphore = asyncio.Semaphore(BATCH_UPLOAD_MAX_CONCURRENCY)
+
+    async def write(upload: dict) -> None:
+        async with semaphore:
+            try:
+                _, upload["etag"] = await upload_stream_to_s3(
+                    upload["file"], upload["s3_key"]
+                )
+            except Exception as e:
+                logger.error(f"Upload of {upload['filename']} failed: {str(e)}")
+                upload["error"] = e
+            else:
+                upload["uploaded"] = True
+
+    async def extract(upload: dict) -> None:
+        upload["metadata"] = await extract_inline_metadata(
+            FileType(upload["file_type"]).value, upload["file"].file
+        )
+
+    await asyncio.gather(
+        *(write(upload) for upload in uploads if upload["sha256"] not in stored_digests)
+    )
+    await asyncio.gather(
+        *(
+            extract(upload)
+            for upload in uploads
+            if upload["uploaded"] and can_extract_inline(upload["file_size"])
+        )
+    )
+
+
+async def register_uploads(
+    uploads: list[dict], visibility: Visibility, current_user: dict
+) -> list[dict]:
+    """
+    Reference the blobs of stored uploads and insert their file rows in bulk.
+
+    Uploads whose content already has extracted metadata reuse it, metadata
+    parsed inline is inserted in the same transaction, and extraction for the
+    rest is dispatched in one message.
+    """
+    if not uploads:
+        return []
+
+    async with engine.begin() as connection:
+        blobs = await acquire_blobs(uploads, connection)
+        for upload in uploads:
+            if blobs[upload["sha256"]]["created"] and not upload["uploaded"]:
+                # The blob was purged between the lookup and the upsert
+                await upload["file"].seek(0)
+                _, upload["etag"] = await upload_stream_to_s3(
+                    upload["file"], upload["s3_key"]
+                )
+                upload["uploaded"] = True
+
+        file_rows = [
+            {
+                "id": uuid.uuid4(),
+                "owner_id": current_user["id"],
+                "department_id": current_user["department_id"],
+                "filename": upload["filename"],
+                "file_type": upload["file_type"],
+                "visibility": visibility,
+                "file_size": upload["file_size"],
+                "s3_key": upload["s3_key"],
+                "etag": upload["etag"],
+                "blob_id": blobs[upload["sha256"]]["id"],
+            }
+            for upload in uploads
+        ]
+        insert_query = (
+            File.__table__.insert().values(file_rows).returning(File.__table__)
+        )
+        inserted = {row["id"]: row for row in await fetch_all(insert_query, connection)}
+        file_records = [inserted[row["id"]] for row in file_rows]
+        file_metadata = await copy_blob_metadata(file_records, connection)
+        inline_metadata = await insert_inline_metadata(
+            [
+                (file_record, upload["metadata"])
+                for file_record, upload in zip(file_records, uploads)
+                if upload["metadata"] is not None
+                and file_record["id"] not in file_metadata
+            ],
+            connection,
+        )
+
+    pending = []
+    for file_record in file_records:
+        if file_record["id"] in file_metadata:
+            file_record["file_metadata"] = file_metadata[file_record["id"]]
+            logger.info(f"File uploaded: {file_record['id']}, reused blob metadata")
+        elif file_record["id"] in inline_metadata:
+            file_record["file_metadata"] = inline_metadata[file_record["id"]]
+            logger.info(f"File uploaded: {file_record['id']}, metadata extracted")
+        else:
+            pending.append(file_record)
+    await invalidate_file_pages()
+    await dispatch_extraction(pending)
+    return file_records
+
+
+async def acquire_blobs(uploads: list[dict], connection: AsyncConnection) -> dict:
+    """
+    Insert blobs or take more references to existing ones, keyed by digest.
+    The `created` flag of each blob is true when its row was newly inserted.
+    """
+    blob_rows = {}
+    for upload in uploads:
+        blob_row = blob_rows.setdefault(
+            upload["sha256"],
+            {
+                "sha256": upload["sha256"],
+                "s3_key": upload["s3_key"],
+                "file_size": upload["file_size"],
+                "ref_count": 0,
+            },
+        )
+        blob_row["ref_count"] += 1
+
+    upsert_query = pg_insert(FileBlob).values(list(blob_rows.values()))
+    upsert_query = upsert_query.on_conflict_do_update(
+        index_elements=[FileBlob.sha256],
+        set_={
+            "ref_count": FileBlob.ref_count + upsert_query.excluded.ref_count,
+            "updated_at": datetime.utcnow(),
+        },
+    ).returning(FileBlob.__table__, literal_column("(xmax = 0)").label("created"))
+    return {blob["sha256"]: blob for blob in await fetch_all(upsert_query, connection)}
+
+
+async def copy_blob_metadata(
+    file_records: list[dict], connection: AsyncConnection
+) -> dict:
+    """
+    Copy metadata extracted for other files sharing the same blobs.
+    Returns the new metadata rows keyed by file id.
+    """
+    source_query = (
+        select(
+            File.blob_id.label("source_blob_id"),
+            *(column for column in FileMetadata.__table__.c if not column.computed),
+        )
+        .join(File, File.id == FileMetadata.file_id)
+        .where(File.blob_id.in_({record["blob_id"] for record in file_records}))
+        .distinct(File.blob_id)
+        .order_by(File.blob_id)
+    )
+    sources = {
+        source.pop("source_blob_id"): source
+        for source in await fetch_all(source_query, connection)
+    }
+    metadata_rows = [
+        {
+            **{
+                key: value
+                for key, value in sources[record["blob_id"]].items()
+                if key not in ("id", "created_at", "updated_at")
+            },
+            "id": uuid.uuid4(),
+            "file_id": record["id"],
+        }
+        for record in file_records
+        if record["blob_id"] in sources
+    ]
+    if not metadata_rows:
+        return {}
+
+    insert_query = (
+        FileMetadata.__table__.insert()
+        .values(metadata_rows)
+        .returning(*metadata_response_columns())
+    )
+    return {row["file_id"]: row for row in await fetch_all(insert_query, connection)}
+
+
+async def insert_inline_metadata(
+    parsed: list[tuple[dict, dict]], connection: AsyncConnection
+) -> dict:
+    """
+    Insert metadata parsed at upload time for (file record, metadata) pairs.
+    Returns the new metadata rows keyed by file id. The insert runs under a
+    savepoint: if Postgres rejects it, the upload still succeeds and the files
+    are left to queued extraction.
+    """
+    if not parsed:
+        return {}
+
+    metadata_rows = [
+        build_metadata_row(file_record["id"], metadata)
+        for file_record, metadata in parsed
+    ]
+    insert_query = (
+        FileMetadata.__table__.insert()
+        .values(metadata_rows)
+        .returning(*metadata_response_columns())
+    )
+    try:
+        async with connection.begin_nested():
+            rows = await fetch_all(insert_query, connection)
+    except DBAPIError as e:
+        logger.warning(
+            f"Inline metadata insert failed, queueing extraction instead: {str(e)}"
+        )
+        return {}
+    return {row["file_id"]: row for row in rows}
+
+
+async def initiate_upload(
+    filename: str, file_size: int, visibility: Visibility, current_user: dict
+) -> dict:
+    """Validate an upload and presign S3 URLs so the client can upload directly."""
+    file_type = validate_upload(filename, file_size, visibility, current_user)
+    s3_key = build_s3_key(current_user, filename)
+    claims = {
+        "sub": str(current_user["id"]),
         "s3_key": s3_key,
+        "filename": filename,
+        "file_type": file_type.value,
+        "visibility": visibility.value,
+        "file_size": file_size,
     }
-    insert_query = File.__table__.insert().values(**file_data)
-    await execute(insert_query, commit_after=True)
 
-    file_record = await fetch_one(select(File).where(File.s3_key == s3_key))
-    logger.info(f"File uploaded: {file_record['id']}, triggering metadata extraction")
-    extract_metadata.delay(str(file_record["id"]), s3_key, file_type.value)
+    upload = {"s3_key": s3_key}
+    if file_size <= S3_MULTIPART_CHUNK_SIZE:
+        upload["url"] = await generate_presigned_put_url(s3_key)
+    else:
+        part_count = math.ceil(file_size / S3_MULTIPART_CHUNK_SIZE)
+        upload_id, part_urls = await create_presigned_multipart_upload(
+            s3_key, part_count
+        )
+        claims["upload_id"] = upload_id
+        upload.update(
+            upload_id=upload_id,
+            part_size=S3_MULTIPART_CHUNK_SIZE,
+            part_urls=part_urls,
+        )
+
+    upload["upload_token"] = create_upload_token(claims)
+    logger.info(f"Direct upload initiated: {s3_key}")
+    return upload
+
+
+async def complete_upload(
+    upload_token: str, parts: list[dict], current_user: dict
+) -> dict:
+    """Verify a direct upload landed in S3 and register it as a file."""
+    claims = decode_upload_token(upload_token)
+    if claims["sub"] != str(current_user["id"]):
+        raise InvalidUploadToken()
+
+    s3_key = claims["s3_key"]
+    async with engine.begin() as connection:
+        # Completions of one token share its key; the lock serializes them so
+        # a retry sees the row of the first instead of inserting a duplicate
+        await connection.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(s3_key)))
+        )
+        existing_file = await fetch_one(
+            select(File).where(File.s3_key == s3_key, File.deleted_at.is_(None)),
+            connection,
+        )
+        if existing_file:
+            return existing_file
+
+        if claims.get("upload_id"):
+            if not parts:
+                raise UploadIncomplete(detail="Multipart uploads must list their parts")
+            await complete_multipart_upload(s3_key, claims["upload_id"], parts)
+
+        s3_object = await head_s3_object(s3_key)
+        if not s3_object or s3_object["ContentLength"] != claims["file_size"]:
+            if s3_object:
+                await delete_from_s3(s3_key)
+            raise UploadIncomplete()
+
+        file_record = await fetch_one(
+            File.__table__.insert()
+            .values(
+                owner_id=current_user["id"],
+                department_id=current_user["department_id"],
+                filename=claims["filename"],
+                file_type=FileType(claims["file_type"]),
+                visibility=Visibility(claims["visibility"]),
+                file_size=s3_object["ContentLength"],
+                s3_key=s3_key,
+                etag=s3_object["ETag"],
+            )
+            .returning(File.__table__),
+            connection,
+        )
+
+    await invalidate_file_pages()
+    await dispatch_extraction([file_record])
+    return file_record
+
+
+async def create_upload_session(
+    filename: str, file_size: int, visibility: Visibility, current_user: dict
+) -> dict:
+    """
+    Validate an upload and open a resumable session for it, backed by an S3
+    multipart upload with one part per S3_MULTIPART_CHUNK_SIZE bytes.
+    """
+    file_type = validate_upload(filename, file_size, visibility, current_user)
+    s3_key = build_s3_key(current_user, filename)
+    upload_id = await create_multipart_upload(s3_key)
+    insert_query = (
+        UploadSession.__table__.insert()
+        .values(
+            owner_id=current_user["id"],
+            department_id=current_user["department_id"],
+            filename=filename,
+            file_type=file_type,
+            visibility=visibility,
+            file_size=file_size,
+            part_size=S3_MULTIPART_CHUNK_SIZE,
+            s3_key=s3_key,
+            upload_id=upload_id,
+            expires_at=datetime.utcnow()
+            + timedelta(seconds=settings.UPLOAD_SESSION_EXPIRE_SECONDS),
+        )
+        .returning(UploadSession.__table__)
+    )
+    try:
+        session = await fetch_one(insert_query, commit_after=True)
+    except BaseException:
+        # Without a session row nothing would ever clean the upload up
+        try:
+            await abort_multipart_upload(s3_key, upload_id)
+        except Exception as e:
+            logger.error(f"Could not abort multipart upload of {s3_key}: {str(e)}")
+        raise
+
+    logger.info(f"Upload session {session['id']} opened: {s3_key}")
+    return build_upload_session_status(session, [])
+
+
+async def get_upload_session_status(session_id: UUID, current_user: dict) -> dict:
+    """Report which parts of a session arrived and the contiguous offset."""
+    session = await get_upload_session(session_id, current_user)
+    if session["file_id"]:
+        return build_upload_session_status(session, None)
+    if session["expires_at"] <= datetime.utcnow():
+        raise UploadSessionExpired()
+
+    parts = await list_multipart_parts(session["s3_key"], session["upload_id"])
+    if parts is None:
+        raise UploadSessionExpired()
+    return build_upload_session_status(session, parts)
+
+
+async def upload_session_chunk(
+    session_id: UUID, offset: int, body: AsyncIterator[bytes], current_user: dict
+) -> dict:
+    """
+    Store the chunk starting at `offset` as the matching multipart part.
+
+    Offsets must fall on part boundaries and chunks must fill their part, so
+    chunks can arrive in any order, in parallel, and be resent after a dropped
+    connection; a resent chunk replaces the earlier copy.
+    """
+    session = await get_upload_session(session_id, current_user)
+    if session["file_id"]:
+        raise UploadSessionCompleted()
+    if session["expires_at"] <= datetime.utcnow():
+        raise UploadSessionExpired()
+
+    part_number, chunk_size = locate_chunk(session, offset)
+    chunk = await read_chunk(body, chunk_size)
+    try:
+        await upload_part_to_s3(
+            session["s3_key"], session["upload_id"], part_number, chunk
+        )
+    except UploadIncomplete:
+        raise UploadSessionExpired()
+    return {"part_number": part_number, "offset": offset, "size": chunk_size}
+
+
+async def complete_upload_session(session_id: UUID, current_user: dict) -> dict:
+    """
+    Assemble the parts of a session into its S3 object and register it as a
+    file. Completing a session again returns the file created the first time.
+    """
+    async with engine.begin() as connection:
+        session = await fetch_one(
+            select(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                UploadSession.owner_id == current_user["id"],
+            )
+            .with_for_update(),
+            connection,
+        )
+        if not session:
+            raise UploadSessionNotFound()
+        if session["file_id"]:
+            return await get_file(session["file_id"], current_user)
+        if session["expires_at"] <= datetime.utcnow():
+            raise UploadSessionExpired()
+
+        s3_key, upload_id = session["s3_key"], session["upload_id"]
+        parts = await list_multipart_parts(s3_key, upload_id)
+        if parts is None:
+            # Assembled by an earlier attempt whose transaction did not commit
+            s3_object = await head_s3_object(s3_key)
+            if not s3_object or s3_object["ContentLength"] != session["file_size"]:
+                raise UploadSessionExpired()
+            etag = s3_object["ETag"]
+        else:
+            missing_parts = build_upload_session_status(session, parts)["missing_parts"]
+            if missing_parts:
+                raise UploadIncomplete(
+                    detail=f"{len(missing_parts)} parts have not been uploaded"
+                )
+            etag = await complete_multipart_upload(
+                s3_key,
+                upload_id,
+                [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in parts],
+            )
+
+        file_record = await fetch_one(
+            File.__table__.insert()
+            .values(
+                owner_id=session["owner_id"],
+                department_id=session["department_id"],
+                filename=session["filename"],
+                file_type=session["file_type"],
+                visibility=session["visibility"],
+                file_size=session["file_size"],
+                s3_key=s3_key,
+                etag=etag,
+            )
+            .returning(File.__table__),
+            connection,
+        )
+        await execute(
+            update(UploadSession)
+            .where(UploadSession.id == session_id)
+            .values(file_id=file_record["id"], updated_at=datetime.utcnow()),
+            connection,
+        )
+
+    logger.info(f"Upload session {session_id} completed: {s3_key}")
+    await invalidate_file_pages()
+    await dispatch_extraction([file_record])
     return file_record
 
 
+async def abort_upload_session(session_id: UUID, current_user: dict) -> None:
+    """Abort an incomplete session and discard the parts uploaded so far."""
+    async with engine.begin() as connection:
+        session = await fetch_one(
+            select(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                UploadSession.owner_id == current_user["id"],
+            )
+            .with_for_update(),
+            connection,
+        )
+        if not session:
+            raise UploadSessionNotFound()
+        if session["file_id"]:
+            raise UploadSessionCompleted()
+
+        await execute(
+            delete(UploadSession).where(UploadSession.id == session_id), connection
+        )
+        await abort_multipart_upload(session["s3_key"], session["upload_id"])
+    logger.info(f"Upload session {session_id} aborted")
+
+
+async def get_upload_session(session_id: UUID, current_user: dict) -> dict:
+    """Get an upload session of the current user."""
+    session = await fetch_one(
+        select(UploadSession).where(
+            UploadSession.id == session_id,
+            UploadSession.owner_id == current_user["id"],
+        )
+    )
+    if not session:
+        raise UploadSessionNotFound()
+    return session
+
+
+def build_upload_session_status(session: dict, parts: list[dict] | None) -> dict:
+    """
+    Describe a session from its uploaded parts; None means it was completed.
+    The offset is the number of bytes received without gaps from the start.
+    """
+    file_size, part_size = session["file_size"], session["part_size"]
+    part_count = math.ceil(file_size / part_size)
+    if parts is None:
+        received = set(range(1, part_count + 1))
+    else:
+        received = {part["PartNumber"] for part in parts}
+
+    missing_parts = [n for n in range(1, part_count + 1) if n not in received]
+    offset = (missing_parts[0] - 1) * part_size if missing_parts else file_size
+    received_bytes = sum(
+        min(part_size, file_size - (part_number - 1) * part_size)
+        for part_number in received
+    )
+    return {
+        "id": session["id"],
+        "filename": session["filename"],
+        "file_size": file_size,
+        "part_size": part_size,
+        "part_count": part_count,
+        "offset": offset,
+        "received_bytes": received_bytes,
+        "missing_parts": missing_parts,
+        "expires_at": session["expires_at"],
+        "file_id": session["file_id"],
+    }
+
+
+def locate_chunk(session: dict, offset: int) -> tuple[int, int]:
+    """Return the part number and exact size of the chunk at `offset`."""
+    file_size, part_size = session["file_size"], session["part_size"]
+    if offset >= file_size or offset % part_size:
+        raise InvalidChunk(
+            detail=f"Chunk offsets must be multiples of {part_size} below {file_size}"
+        )
+    return offset // part_size + 1, min(part_size, file_size - offset)
+
+
+async def read_chunk(body: AsyncIterator[bytes], size: int) -> bytes:
+    """Read a request body that must be exactly `size` bytes long."""
+    buffer = bytearray()
+    async for data in body:
+        buffer.extend(data)
+        if len(buffer) > size:
+            break
+    if len(buffer) != size:
+        raise InvalidChunk(detail=f"Chunk must be exactly {size} bytes")
+    return bytes(buffer)
+
+
+def build_s3_key(current_user: dict, filename: str) -> str:
+    """
+    Choose a unique S3 key for a new upload. A long filename is cut before its
+    extension so the key fits the s3_key columns.
+    """
+    prefix = f"files/{current_user['id']}/{uuid.uuid4().hex}/"
+    max_length = File.__table__.c.s3_key.type.length - len(prefix)
+    if len(filename) > max_length:
+        stem, extension = os.path.splitext(filename)
+        filename = stem[: max(max_length - len(extension), 0)] + extension
+    return prefix + filename[:max_length]
+
+
+async def dispatch_extraction(file_records: list[dict]) -> None:
+    """
+    Queue metadata extraction for newly stored files.
+
+    Jobs wait in a Redis list until EXTRACTION_BATCH_SIZE of them are pending
+    or EXTRACTION_BATCH_SECONDS have passed since the first one, then a single
+    task extracts them together.
+    """
+    jobs = [
+        (str(record["id"]), record["s3_key"], FileType(record["file_type"]).value)
+        for record in file_records
+    ]
+    if not jobs:
+        return
+
+    logger.info(f"Triggering metadata extraction for files: {[j[0] for j in jobs]}")
+    pending = await queue_extractions(jobs)
+    batch_size = settings.EXTRACTION_BATCH_SIZE
+    if pending < batch_size <= pending + len(jobs):
+        extract_pending_metadata.delay()
+    elif pending == 0:
+        extract_pending_metadata.apply_async(
+            countdown=settings.EXTRACTION_BATCH_SECONDS
+        )
+
+
 async def get_file(file_id: UUID, current_user: dict) -> dict:
     """Get file details with access checks."""
-    file = await fetch_one(select(File).where(File.id == file_id))
+    file = await get_cached_file(file_id, lambda: load_file(file_id))
     if not file:
         raise FileNotFound()
 
     if await can_access_file(file, current_user):
-        file_metadata = await fetch_one(
-            select(FileMetadata).where(FileMetadata.file_id == file_id)
-        )
-        file["file_metadata"] = file_metadata if file_metadata else {}
+        await merge_pending_downloads([file])
         return file
     raise FileAccessDenied()
 
 
-async def download_file(file_id: UUID, current_user: dict) -> tuple[bytes, str]:
-    """Download a file from S3 with access checks."""
-    file = await fetch_one(select(File).where(File.id == file_id))
+async def load_file(file_id: UUID) -> dict | None:
+    """Load a live file with its metadata from the database."""
+    row = await fetch_one(select_live_file(file_id))
+    return split_file_metadata(row) if row else None
+
+
+def select_live_file(file_id: UUID) -> Select:
+    """Select a file unless deleted, with its metadata; pair with load_file."""
+    return select_files_with_metadata().where(
+        File.id == file_id, File.deleted_at.is_(None)
+    )
+
+
+def select_files_with_metadata() -> Select:
+    """
+    Select files LEFT JOINed with their metadata, whose columns are prefixed
+    with METADATA_PREFIX; pair with split_file_metadata.
+    """
+    metadata_columns = [
+        column.label(f"{METADATA_PREFIX}{column.name}")
+        for column in metadata_response_columns()
+    ]
+    return select(File.__table__, *metadata_columns).outerjoin(
+        FileMetadata, FileMetadata.file_id == File.id
+    )
+
+
+def metadata_response_columns() -> list[Column]:
+    """The file_metadata columns returned to clients, without the search text."""
+    return [
+        column
+        for column in FileMetadata.__table__.c
+        if column.name not in METADATA_SEARCH_COLUMNS
+    ]
+
+
+def split_file_metadata(row: dict) -> dict:
+    """Move prefixed metadata columns of a joined row into `file_metadata`."""
+    file, file_metadata = {}, {}
+    for key, value in row.items():
+        if key.startswith(METADATA_PREFIX):
+            file_metadata[key.removeprefix(METADATA_PREFIX)] = value
+        else:
+            file[key] = value
+    file["file_metadata"] = file_metadata if file_metadata["id"] else {}
+    return file
+
+
+async def download_file(
+    file_id: UUID,
+    current_user: dict,
+    range_header: str | None = None,
+    if_range: str | None = None,
+    redirect: bool = False,
+    if_none_match: str | None = None,
+    if_modified_since: str | None = None,
+) -> dict:
+    """
+    Prepare a file download with access checks.
+
+    Large files, or any file when `redirect` is set, get a presigned S3
+    `redirect_url`. Otherwise an S3 `stream` is opened for the requested range.
+
+    Conditional requests are answered from the cached file: stored content never
+    changes, so its ETag and created_at are its validators. `not_modified` is
+    set instead of touching S3; only an If-None-Match for a file whose ETag is
+    not recorded yet is forwarded to S3, and the ETag is recorded from then on.
+    """
+    file = await get_cached_file(file_id, lambda: load_file(file_id))
     if not file:
         raise FileNotFound()
+    if not await can_access_file(file, current_user):
+        raise FileAccessDenied()
 
-    if await can_access_file(file, current_user):
-        file_content = await download_from_s3(file["s3_key"])
-        await execute(
-            update(File)
-            .where(File.id == file_id)
-            .values(download_count=File.download_count + 1),
-            commit_after=True,
+    download = {
+        "filename": file["filename"],
+        "visibility": file["visibility"],
+        "etag": file["etag"],
+        "last_modified": file["created_at"],
+        "not_modified": False,
+        "redirect_url": None,
+        "stream": None,
+    }
+    if is_not_modified(
+        file["etag"], file["created_at"], if_none_match, if_modified_since
+    ):
+        download["not_modified"] = True
+        return download
+
+    redirect_min_size = settings.DOWNLOAD_REDIRECT_MIN_SIZE
+    if redirect or (
+        redirect_min_size is not None and file["file_size"] >= redirect_min_size
+    ):
+        download["redirect_url"] = await generate_presigned_get_url(
+            file["s3_key"], build_content_disposition(file["filename"])
+        )
+        await record_download(file)
+        return download
+
+    byte_range = parse_range_header(range_header, file["file_size"])
+    download["stream"] = await stream_from_s3(
+        file["s3_key"],
+        byte_range,
+        if_range,
+        if_none_match=None if file["etag"] else if_none_match,
+    )
+    if download["stream"] is None:
+        download["not_modified"] = True
+        return download
+
+    try:
+        if not file["etag"] and download["stream"]["etag"]:
+            download["etag"] = download["stream"]["etag"]
+            await record_etag(file["s3_key"], download["etag"])
+        # Resumed or seeking range requests are not separate downloads.
+        content_range = download["stream"]["content_range"]
+        if not content_range or content_range.startswith("bytes 0-"):
+            await record_download(file)
+    except BaseException:
+        # The body is never iterated, so its connection must be released here
+        await download["stream"]["close"]()
+        raise
+    return download
+
+
+async def record_etag(s3_key: str, etag: str) -> None:
+    """Record the ETag of an S3 object on every file stored in it."""
+    updated = await fetch_all(
+        update(File)
+        .where(File.s3_key == s3_key, File.etag.is_(None))
+        # Not a change of the file itself, so its info ETag stays the same
+        .values(etag=etag, updated_at=File.updated_at)
+        .returning(File.id),
+        commit_after=True,
+    )
+    await invalidate_files(row["id"] for row in updated)
+
+
+async def download_files_zip(
+    file_ids: list[UUID] | None, department_id: UUID | None, current_user: dict
+) -> AsyncIterator[bytes]:
+    """
+    Check access to many files in one query and return a stream of a ZIP
+    archive of them. Access errors are raised before anything is streamed.
+    """
+    files = await select_downloadable_files(file_ids, department_id, current_user)
+    logger.info(f"Streaming ZIP of {len(files)} files for user {current_user['id']}")
+    return stream_files_zip(files)
+
+
+async def select_downloadable_files(
+    file_ids: list[UUID] | None, department_id: UUID | None, current_user: dict
+) -> list[dict]:
+    """
+    Select the live files of a ZIP download, listed by id or all the files of a
+    department the user may download. Listed ids that are missing or not
+    downloadable fail the whole request.
+    """
+    if file_ids is not None and len(file_ids) > ZIP_DOWNLOAD_MAX_FILES:
+        raise TooManyFiles()
+    files = await fetch_all(
+        build_downloadable_files_query(file_ids, department_id, current_user)
+    )
+
+    if file_ids is not None:
+        files_by_id = {file["id"]: file for file in files}
+        if len(files_by_id) < len(set(file_ids)):
+            raise FileNotFound()
+        if not all(file.pop("downloadable") for file in files):
+            raise FileAccessDenied()
+        return [files_by_id[file_id] for file_id in dict.fromkeys(file_ids)]
+
+    if len(files) > ZIP_DOWNLOAD_MAX_FILES:
+        raise TooManyFiles()
+    if not files:
+        raise FileNotFound(detail="No files to download")
+    return files
+
+
+def build_downloadable_files_query(
+    file_ids: list[UUID] | None, department_id: UUID | None, current_user: dict
+) -> Select:
+    """
+    Select the listed live files with a `downloadable` flag each, or up to
+    ZIP_DOWNLOAD_MAX_FILES + 1 live files of a department the user may download.
+
+    A department is read as a UNION ALL of one ordered arm per visibility the
+    user may download, so each arm is an index range instead of one scan of the
+    whole department that filters out what the user may not download.
+    """
+    if file_ids is not None:
+        return select(File, downloadable_by(current_user).label("downloadable")).where(
+            File.id.in_(file_ids), File.deleted_at.is_(None)
         )
-        logger.info(
-            f"File downloaded: {file_id}, \
-            new download count: {file['download_count'] + 1}"
+
+    limit = ZIP_DOWNLOAD_MAX_FILES + 1
+    arms = [
+        select(File)
+        .where(File.department_id == department_id, File.deleted_at.is_(None), arm)
+        .order_by(File.created_at, File.id)
+        .limit(limit)
+        for arm in downloadable_arms(current_user)
+    ]
+    if len(arms) == 1:
+        return arms[0]
+    files = union_all(*arms).subquery("files")
+    return select(files).order_by(files.c.created_at, files.c.id).limit(limit)
+
+
+async def stream_files_zip(files: list[dict]) -> AsyncIterator[bytes]:
+    """
+    Stream a ZIP of stored entries straight from S3, with ZIP_PREFETCH_FILES
+    objects fetched ahead. Objects purged since the access check are left out.
+    Downloads of the included files are counted together once it completes.
+    """
+    included = []
+
+    async def prepend(first: bytes, body: AsyncIterator[bytes]):
+        yield first
+        async for chunk in body:
+            yield chunk
+
+    async def entries() -> AsyncIterator[ZipEntry]:
+        names = build_zip_entry_names([file["filename"] for file in files])
+        bodies = stream_many_from_s3(
+            [file["s3_key"] for file in files], ZIP_PREFETCH_FILES, ZIP_PREFETCH_CHUNKS
         )
-        return file_content, file["filename"]
-    raise FileAccessDenied()
+        async with aclosing(bodies):
+            position = 0
+            async for body in bodies:
+                file, name = files[position], names[position]
+                position += 1
+                try:
+                    first = await anext(body)
+                except StopAsyncIteration:
+                    first = b""
+                except FileNotFound:
+                    logger.warning(f"Skipped missing file in ZIP: {file['id']}")
+                    continue
+                included.append(file["id"])
+                yield ZipEntry(
+                    name, file["file_size"], file["created_at"], prepend(first, body)
+                )
+
+    async with aclosing(entries()) as zip_entries:
+        async for chunk in stream_zip(zip_entries):
+            yield chunk
+    await record_downloads(included)
+
+
+async def record_download(file: dict) -> None:
+    """Count a download; the counter is flushed to the database periodically."""
+    await record_downloads([file["id"]])
+    logger.info(f"File downloaded: {file['id']}")
+
+
+async def merge_pending_downloads(files: list[dict]) -> None:
+    """Add downloads not yet flushed to the database to each file's count."""
+    pending = await get_pending_downloads([file["id"] for file in files])
+    for file in files:
+        file["download_count"] += pending.get(file["id"], 0)
 
 
 async def delete_file(file_id: UUID, current_user: dict) -> None:
-    """Delete a file from S3 and database with access checks."""
-    file = await fetch_one(select(File).where(File.id == file_id))
+    """Soft-delete a file with access checks; the purge task removes it later."""
+    file = await fetch_one(
+        select(File).where(File.id == file_id, File.deleted_at.is_(None))
+    )
     if not file:
         raise FileNotFound()
 
@@ -127,19 +1102,143 @@ async def delete_file(file_id: UUID, current_user: dict) -> None:
             detail="Managers can only delete files in their department"
         )
 
-    await delete_from_s3(file["s3_key"])
-    await execute(File.__table__.delete().where(File.id == file_id), commit_after=True)
     await execute(
-        FileMetadata.__table__.delete().where(FileMetadata.file_id == file_id),
+        update(File)
+        .where(File.id == file_id, File.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow()),
         commit_after=True,
     )
+    await invalidate_files([file_id])
+    purge_deleted_files.delay()
     logger.info(f"File deleted: {file_id}")
 
 
-async def list_files(department_id: UUID | None, current_user: dict) -> list[dict]:
-    """List files accessible to the user."""
+async def delete_files(file_ids: list[UUID], current_user: dict) -> dict:
+    """
+    Soft-delete many files in one UPDATE, limited to the files the role may delete.
+    Returns the deleted ids and the ids that were missing or not permitted.
+    """
+    if len(file_ids) > BULK_DELETE_MAX_FILES:
+        raise TooManyFiles()
+
+    role = Role(current_user["role"])
+    query = update(File).where(File.id.in_(file_ids), File.deleted_at.is_(None))
+    if role == Role.USER:
+        query = query.where(File.owner_id == current_user["id"])
+    elif role == Role.MANAGER:
+        query = query.where(File.department_id == current_user["department_id"])
+
+    deleted = await fetch_all(
+        query.values(deleted_at=datetime.utcnow()).returning(File.id),
+        commit_after=True,
+    )
+    deleted_ids = {row["id"] for row in deleted}
+    if deleted_ids:
+        await invalidate_files(deleted_ids)
+        purge_deleted_files.delay()
+    logger.info(f"Files deleted: {len(deleted_ids)} by user {current_user['id']}")
+    return {
+        "deleted": list(deleted_ids),
+        "failed": [file_id for file_id in file_ids if file_id not in deleted_ids],
+    }
+
+
+async def list_files(
+    department_id: UUID | None,
+    current_user: dict,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """List a page of files accessible to the user, with their metadata."""
+    query = filter_accessible_files(
+        select_files_with_metadata(), current_user, department_id
+    )
+    query = paginate(query, File.created_at, File.id, cursor, limit)
+
+    async def load_page() -> dict:
+        page = build_page(await fetch_all(query), limit)
+        page["items"] = [split_file_metadata(row) for row in page["items"]]
+        return page
+
+    page = await get_cached_page(
+        build_page_key(current_user, department_id, cursor, limit), load_page
+    )
+    await merge_pending_downloads(page["items"])
+    logger.info(f"Listed {len(page['items'])} files for user {current_user['id']}")
+    return page
+
+
+async def search_files(
+    search_query: str,
+    department_id: UUID | None,
+    current_user: dict,
+    limit: int = SEARCH_DEFAULT_RESULTS,
+) -> list[dict]:
+    """
+    Full-text search over the titles and text of the files the user may see,
+    best matches first. Access rules are applied in SQL by
+    filter_accessible_files, and headlines are only built for returned rows.
+    """
+    query = build_search_query(search_query, department_id, current_user, limit)
+    results = []
+    for row in await fetch_all(query):
+        rank_value, headline_text = row.pop("rank"), row.pop("headline")
+        results.append(
+            {
+                "file": split_file_metadata(row),
+                "rank": rank_value,
+                "headline": headline_text or "",
+            }
+        )
+    await merge_pending_downloads([result["file"] for result in results])
+    logger.info(f"Search returned {len(results)} files for user {current_user['id']}")
+    return results
+
+
+def build_search_query(
+    search_query: str,
+    department_id: UUID | None,
+    current_user: dict,
+    limit: int = SEARCH_DEFAULT_RESULTS,
+) -> Select:
+    """
+    Select the top `limit` matches with their metadata, `rank` and `headline`.
+    Matches are ranked in a subquery so ts_headline only runs on those rows.
+    """
+    config = literal_column(f"'{SEARCH_TEXT_CONFIG}'::regconfig")
+    tsquery = func.websearch_to_tsquery(config, search_query)
+    rank = func.ts_rank_cd(FileMetadata.search_vector, tsquery)
+    matches = filter_accessible_files(
+        select(File.id, rank.label("rank"))
+        .join(FileMetadata, FileMetadata.file_id == File.id)
+        .where(FileMetadata.search_vector.bool_op("@@")(tsquery)),
+        current_user,
+        department_id,
+    )
+    matches = matches.order_by(rank.desc(), File.id).limit(limit).subquery()
+    headline = func.ts_headline(
+        config,
+        FileMetadata.content_text,
+        tsquery,
+        SEARCH_HEADLINE_OPTIONS,
+    )
+    return (
+        select_files_with_metadata()
+        .add_columns(matches.c.rank, headline.label("headline"))
+        .join(matches, matches.c.id == File.id)
+        .order_by(matches.c.rank.desc(), File.id)
+    )
+
+
+def filter_accessible_files(
+    query: Select, current_user: dict, department_id: UUID | None = None
+) -> Select:
+    """
+    Restrict a files query to live files the user may see, optionally in one
+    department. The indexes on files are matched to these predicates.
+    """
     role = Role(current_user["role"])
-    query = select(File)
+    query = query.where(File.deleted_at.is_(None))
 
     if role == Role.ADMIN:
         if department_id:
@@ -156,23 +1255,36 @@ async def list_files(department_id: UUID | None, current_user: dict) -> list[dic
         query = query.where(
             (File.visibility == Visibility.PUBLIC)
             | (
-                File.department_id
-                == current_user["department_id"] & File.visibility
-                == Visibility.DEPARTMENT
+                (File.department_id == current_user["department_id"])
+                & (File.visibility == Visibility.DEPARTMENT)
             )
             | (File.owner_id == current_user["id"])
         )
-        if department_id and department_id != current_user["department_id"]:
+        if department_id and str(department_id) != current_user["department_id"]:
             raise FileAccessDenied(detail="Users cannot access other departments")
 
-    files = await fetch_all(query)
-    for file in files:
-        file_metadata = await fetch_one(
-            select(FileMetadata).where(FileMetadata.file_id == file["id"])
-        )
-        file["file_metadata"] = file_metadata if file_metadata else {}
-    logger.info(f"Listed {len(files)} files for user {current_user['id']}")
-    return files
+    return query
+
+
+def downloadable_by(current_user: dict) -> ColumnElement[bool]:
+    """can_access_file as a SQL expression, to check many files in one query."""
+    return or_(*downloadable_arms(current_user))
+
+
+def downloadable_arms(current_user: dict) -> list[ColumnElement[bool]]:
+    """The disjoint parts of downloadable_by, one per visibility."""
+    role = Role(current_user["role"])
+    if role == Role.ADMIN:
+        return [true()]
+
+    department_files = File.visibility == Visibility.DEPARTMENT
+    if role == Role.USER:
+        department_files &= File.department_id == current_user["department_id"]
+    return [
+        File.visibility == Visibility.PUBLIC,
+        department_files,
+        (File.visibility == Visibility.PRIVATE) & (File.owner_id == current_user["id"]),
+    ]
 
 
 async def can_access_file(file: dict, current_user: dict) -> bool:
@@ -183,9 +1295,8 @@ async def can_access_file(file: dict, current_user: dict) -> bool:
     if file["visibility"] == Visibility.PUBLIC:
         return True
     if file["visibility"] == Visibility.DEPARTMENT:
-        return (
-            role == Role.MANAGER
-            or file["department_id"] == current_user["department_id"]
+        return role == Role.MANAGER or str(file["department_id"]) == str(
+            current_user["department_id"]
         )
     if file["visibility"] == Visibility.PRIVATE:
         return file["owner_id"] == current_user["id"]  # Direct UUID comparison
@@ -1,7 +1,28 @@
+import hashlib
 import os
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable
+from urllib import parse
+from uuid import UUID
 
-from src.files.constants import FileType
-from src.files.exceptions import InvalidFileType
+import jwt
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from src.auth.constants import TokenType
+from src.config import settings
+from src.files.constants import S3_MULTIPART_CHUNK_SIZE, FileType
+from src.files.exceptions import (
+    InvalidFileType,
+    InvalidUploadToken,
+    RangeNotSatisfiable,
+)
+from src.files.schemas import FileResponse
+from src.schemas import datetime_to_gmt_str
+
+RANGE_HEADER_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
 
 
 def get_file_type(filename: str) -> FileType:
@@ -13,3 +34,206 @@ def get_file_type(filename: str) -> FileType:
         return FileType.DOCX
     else:
         raise InvalidFileType()
+
+
+async def compute_sha256(file: UploadFile) -> tuple[str, int]:
+    """Hash an upload's spooled content and rewind it; returns (digest, size)."""
+    return await run_in_threadpool(_sha256_fileobj, file.file)
+
+
+def _sha256_fileobj(fileobj) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    file_size = 0
+    fileobj.seek(0)
+    while chunk := fileobj.read(S3_MULTIPART_CHUNK_SIZE):
+        digest.update(chunk)
+        file_size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), file_size
+
+
+def build_zip_entry_names(filenames: list[str]) -> list[str]:
+    """
+    Name ZIP entries after the original filenames, flattened into the archive
+    root and numbered when they repeat, e.g. "report (2).pdf".
+    """
+    names, taken = [], set()
+    for filename in filenames:
+        filename = filename.replace("/", "_").replace("\\", "_").lstrip(".") or "file"
+        stem, ext = os.path.splitext(filename)
+        name, number = filename, 1
+        while name.lower() in taken:
+            number += 1
+            name = f"{stem} ({number}){ext}"
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+
+def build_content_disposition(filename: str) -> str:
+    """Build an attachment Content-Disposition header for the original filename."""
+    # URL-encode the filename to handle non-ASCII characters
+    encoded_filename = parse.quote(filename)
+    return f"attachment; filename*=UTF-8''{encoded_filename}"
+
+
+def parse_range_header(
+    range_header: str | None, file_size: int
+) -> tuple[int, int] | None:
+    """
+    Parse a single-range `Range` header into inclusive byte offsets.
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges; the whole file is sent in that case, as RFC 9110 allows.
+    """
+    if not range_header:
+        return None
+
+    match = RANGE_HEADER_PATTERN.match(range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if not start:  # Suffix range: the last `end` bytes
+        if int(end) == 0 or file_size == 0:
+            raise RangeNotSatisfiable(file_size)
+        return max(file_size - int(end), 0), file_size - 1
+
+    if end and int(end) < int(start):
+        return None
+    if int(start) >= file_size:
+        raise RangeNotSatisfiable(file_size)
+
+    last_byte = file_size - 1
+    return int(start), min(int(end), last_byte) if end else last_byte
+
+
+def build_file_etag(file: dict) -> str:
+    """
+    Strong ETag of a file info response, from the file's updated_at and
+    download count and the state of its metadata.
+    """
+    file_metadata = file.get("file_metadata")
+    state = ":".join(
+        [
+            str(file["id"]),
+            file["updated_at"].isoformat(),
+            str(file["download_count"]),
+            file_metadata["updated_at"].isoformat() if file_metadata else "pending",
+        ]
+    )
+    return f'"{hashlib.sha256(state.encode()).hexdigest()[:32]}"'
+
+
+def build_file_page_content(page: dict) -> dict:
+    """
+    Build the Page[FileResponse] JSON content of a listing straight from its
+    rows, formatted as the response model would, for an ORJSONResponse.
+    UUIDs are passed as strings: orjson rejects asyncpg's UUID subclass.
+    """
+    return {
+        "items": [_file_content(file) for file in page["items"]],
+        "next_cursor": page["next_cursor"],
+    }
+
+
+def _file_content(file: dict) -> dict:
+    content = {}
+    for name, convert, required in FILE_RESPONSE_FIELDS:
+        value = file[name] if required else file.get(name)
+        content[name] = value if convert is None else convert(value)
+    return content
+
+
+def _file_metadata_content(file_metadata: dict | None) -> dict | None:
+    # Untyped in FileResponse, so its datetimes stay in ISO format
+    if not file_metadata:
+        return file_metadata
+    return {
+        **file_metadata,
+        "id": str(file_metadata["id"]),
+        "file_id": str(file_metadata["file_id"]),
+    }
+
+
+def _field_converter(annotation: Any) -> Callable[[Any], Any] | None:
+    """How build_file_page_content formats a FileResponse field, None to copy it."""
+    if annotation is UUID:
+        return str
+    if annotation is datetime:
+        return datetime_to_gmt_str
+    if annotation in (dict, dict | None):
+        return _file_metadata_content
+    if annotation in (str, int) or (
+        isinstance(annotation, type) and issubclass(annotation, str)
+    ):
+        return None  # Plain values and str enums, which orjson writes as is
+    raise TypeError(f"No JSON format for FileResponse fields of type {annotation}")
+
+
+# (name, converter, required) of each FileResponse field, in response order
+FILE_RESPONSE_FIELDS = [
+    (name, _field_converter(field.annotation), field.is_required())
+    for name, field in FileResponse.model_fields.items()
+]
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a datetime for HTTP headers; naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    # botocore uses dateutil's tzutc, which format_datetime rejects for GMT
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(
+    etag: str | None,
+    last_modified: datetime,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when it is absent, as RFC 9110
+    does for GET. ETags compare weakly; `last_modified` is naive UTC.
+    """
+    if if_none_match is not None:
+        if not etag:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return any(
+            candidate.strip().removeprefix("W/") == etag
+            for candidate in if_none_match.split(",")
+        )
+
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    # HTTP dates have whole seconds
+    return last_modified.replace(microsecond=0) <= since
+
+
+def create_upload_token(claims: dict) -> str:
+    """Sign the server-chosen parameters of a direct-to-S3 upload."""
+    expire = datetime.now(timezone.utc) + timedelta(
+        seconds=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS
+    )
+    to_encode = {**claims, "exp": expire, "type": TokenType.UPLOAD.value}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_upload_token(token: str) -> dict:
+    """Decode an upload token issued by create_upload_token."""
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.InvalidTokenError:
+        raise InvalidUploadToken()
+
+    if claims.get("type") != TokenType.UPLOAD.value:
+        raise InvalidUploadToken()
+    return claims
@@ -0,0 +1,62 @@
+import zipfile
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, NamedTuple
+
+# The DOS timestamps of ZIP entries cannot represent dates before 1980
+ZIP_EPOCH = datetime(1980, 1, 1)
+UNIX_FILE_ATTRIBUTES = 0o100644 << 16
+
+
+class ZipEntry(NamedTuple):
+    name: str
+    size: int  # Expected size, used to choose the zip64 layout up front
+    modified: datetime
+    chunks: AsyncIterable[bytes]
+
+
+class _ZipSink:
+    """
+    A write-only file collecting what zipfile writes. It cannot seek, so
+    zipfile follows each entry with a data descriptor instead of going back
+    to patch sizes and CRCs into its header.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(entries: AsyncIterable[ZipEntry]) -> AsyncIterator[bytes]:
+    """
+    Stream a ZIP archive of stored (uncompressed) entries as their content
+    arrives, so nothing is buffered beyond the chunk in hand. zipfile writes
+    the data descriptors, and the zip64 records for entries, offsets or counts
+    past the classic format's limits.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for entry in entries:
+            info = zipfile.ZipInfo(
+                entry.name, date_time=max(entry.modified, ZIP_EPOCH).timetuple()[:6]
+            )
+            info.file_size = entry.size
+            info.external_attr = UNIX_FILE_ATTRIBUTES
+            with archive.open(info, mode="w") as target:
+                async for chunk in entry.chunks:
+                    target.write(chunk)
+                    if data := sink.take():
+                        yield data
+            if data := sink.take():
+                yield data
+    yield sink.take()
@@ -2,12 +2,18 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from src.auth.dependencies import require_role
 from src.auth.router import router as auth_router
+from src.cache import get_cache_stats
 from src.config import app_configs, settings
+from src.files.metadata import start_inline_metadata_pool
 from src.files.router import router as files_router
+from src.files.s3 import close_s3_client, open_s3_client
+from src.redis import close_redis
+from src.users.constants import Role
 from src.users.router import router as users_router
 
 
@@ -15,8 +21,12 @@ from src.users.router import router as users_router
 async def lifespan(_application: FastAPI) -> AsyncGenerator:
     """Handle startup and shutdown events."""
     # Startup
+    await open_s3_client()
+    await start_inline_metadata_pool()
     yield
     # Shutdown
+    await close_s3_client()
+    await close_redis()
 
 
 app = FastAPI(**app_configs, lifespan=lifespan)
@@ -41,6 +51,16 @@ app.include_router(users_router, prefix="/api/v1")
 app.include_router(files_router, prefix="/api/v1")
 
 
+@app.get(
+    "/metrics/cache",
+    include_in_schema=False,
+    dependencies=[Depends(require_role([Role.ADMIN]))],
+)
+async def cache_metrics() -> dict[str, dict]:
+    """Hit and miss counters of the caches of this worker process."""
+    return get_cache_stats()
+
+
 @app.get("/healthcheck", include_in_schema=False)
 async def healthcheck() -> dict[str, str]:
     """Check the health of the application."""
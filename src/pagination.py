@@ -0,0 +1,55 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.exceptions import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    payload = json.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor()
+
+
+def paginate(
+    query: Select,
+    created_at: InstrumentedAttribute,
+    row_id: InstrumentedAttribute,
+    cursor: str | None,
+    limit: int,
+) -> Select:
+    """
+    Apply keyset pagination, newest first, ordered by (created_at, id).
+    One extra row is fetched so build_page can tell whether a next page exists.
+    """
+    if cursor:
+        query = query.where(tuple_(created_at, row_id) < tuple_(*decode_cursor(cursor)))
+    return query.order_by(created_at.desc(), row_id.desc()).limit(limit + 1)
+
+
+def build_page(rows: list[dict[str, Any]], limit: int) -> dict[str, Any]:
+    """Cut the rows of a paginated query to a page and compute its next cursor."""
+    if len(rows) <= limit:
+        return {"items": rows, "next_cursor": None}
+
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_cursor(rows[-1]["created_at"], rows[-1]["id"]),
+    }
@@ -0,0 +1,23 @@
+from redis.asyncio import Redis
+
+from src.config import settings
+
+_redis_client: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """Return the Redis client of this process, creating it on first use."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+async def close_redis() -> None:
+    """Close the Redis client and its connection pool."""
+    global _redis_client
+    if _redis_client is None:
+        return
+
+    client, _redis_client = _redis_client, None
+    await client.aclose()
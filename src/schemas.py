@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Generic, TypeVar
 from zoneinfo import ZoneInfo
 
 from fastapi.encoders import jsonable_encoder
@@ -7,6 +8,8 @@ from pydantic import BaseModel, ConfigDict
 
 def datetime_to_gmt_str(dt: datetime) -> str:
     if not dt.tzinfo:
+        if dt.year >= 1000:  # Where isoformat, several times cheaper, agrees
+            return f"{dt.isoformat(timespec='seconds')}+0000"
         dt = dt.replace(tzinfo=ZoneInfo("UTC"))
 
     return dt.strftime("%Y-%m-%dT%H:%M:%S%z")
@@ -23,3 +26,11 @@ class CustomModel(BaseModel):
         default_dict = self.model_dump()
 
         return jsonable_encoder(default_dict)
+
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(CustomModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: str | None = None
@@ -1,18 +1,15 @@
-import asyncio
-import io
 import logging
-from uuid import UUID
 
 from celery import Celery
-from docx import Document
-from PyPDF2 import PdfReader
-from sqlalchemy import insert, select
+from celery.signals import worker_process_shutdown, worker_shutdown
 
 from src.config import settings
-from src.database import async_session, fetch_one
-from src.files.constants import FileType
-from src.files.models import File, FileMetadata
-from src.files.s3 import download_from_s3
+from src.files.counters import flush_download_counts as flush_download_counts_async
+from src.files.extraction import drain_extraction_queue
+from src.files.purge import purge_deleted_files as purge_deleted_files_async
+from src.files.purge import purge_expired_upload_sessions
+from src.users import models as users_models  # noqa: F401  (resolves File.owner)
+from src.worker import run_on_worker_loop, stop_worker_loop
 
 logger = logging.getLogger(__name__)
 
@@ -24,75 +21,64 @@ app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    beat_schedule={
+        "purge-deleted-files": {
+            "task": "src.tasks.purge_deleted_files",
+            "schedule": settings.PURGE_INTERVAL_SECONDS,
+        },
+        "purge-upload-sessions": {
+            "task": "src.tasks.purge_upload_sessions",
+            "schedule": settings.UPLOAD_SESSION_CLEANUP_SECONDS,
+        },
+        "drain-extraction-queue": {
+            "task": "src.tasks.extract_pending_metadata",
+            "schedule": settings.EXTRACTION_QUEUE_SWEEP_SECONDS,
+        },
+        "flush-download-counts": {
+            "task": "src.tasks.flush_download_counts",
+            "schedule": settings.DOWNLOAD_COUNT_FLUSH_SECONDS,
+        },
+    },
 )
 
 
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_loop(**kwargs) -> None:
+    stop_worker_loop()
+
+
 def run_async(coroutine):
-    """Run an async coroutine in the current event loop synchronously."""
-    loop = asyncio.get_event_loop()
-    if loop.is_closed():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(coroutine)
-    finally:
-        if loop.is_running():
-            loop.close()
+    """
+    Run a coroutine on the persistent event loop of this worker process and
+    wait for its result.
+    """
+    return run_on_worker_loop(coroutine)
+
+
+@app.task
+def extract_pending_metadata() -> None:
+    """Extract metadata for the jobs waiting in the Redis extraction queue."""
+    saved = run_async(drain_extraction_queue())
+    if saved:
+        logger.info(f"Drained extraction queue, metadata saved for {saved} files")
+
+
+@app.task
+def purge_deleted_files() -> None:
+    """Remove soft-deleted files from S3 and the database in batches."""
+    purged = run_async(purge_deleted_files_async())
+    logger.info(f"Purge finished, {purged} files removed")
+
+
+@app.task
+def purge_upload_sessions() -> None:
+    """Abort expired upload sessions and remove them from the database."""
+    purged = run_async(purge_expired_upload_sessions())
+    logger.info(f"Upload session purge finished, {purged} sessions removed")
 
 
 @app.task
-def extract_metadata(file_id: str, s3_key: str, file_type: str) -> None:
-    """Extract metadata from a file and save to database."""
-    logger.info(
-        f"Starting metadata extraction for file_id: {file_id}, s3_key: {s3_key}"
-    )
-    try:
-        # Run async download_from_s3 in sync context
-        file_content = run_async(download_from_s3(s3_key))
-        metadata = {}
-
-        if file_type == FileType.PDF.value:
-            pdf = PdfReader(io.BytesIO(file_content))
-            info = pdf.metadata or {}
-            metadata = {
-                "file_id": file_id,
-                "page_count": len(pdf.pages),
-                "title": info.get("/Title", ""),
-                "author": info.get("/Author", ""),
-                "creation_date": info.get("/CreationDate", ""),
-                "creator": info.get("/Creator", ""),
-            }
-        elif file_type == FileType.DOCX.value:
-            doc = Document(io.BytesIO(file_content))
-            metadata = {
-                "file_id": file_id,
-                "paragraph_count": len([p for p in doc.paragraphs if p.text.strip()]),
-                "table_count": len(doc.tables),
-                "title": doc.core_properties.title or "",
-                "author": doc.core_properties.author or "",
-                "creation_date": str(doc.core_properties.created)
-                if doc.core_properties.created
-                else "",
-            }
-
-        async def save_metadata():
-            async with async_session() as session:
-                async with session.begin():
-                    file_exists = await fetch_one(
-                        select(File).where(File.id == UUID(file_id))
-                    )
-                    if file_exists:
-                        await session.execute(insert(FileMetadata).values(**metadata))
-                        logger.info(f"Metadata saved for file_id: {file_id}")
-                    else:
-                        logger.warning(
-                            f"File not found for metadata extraction: {file_id}"
-                        )
-
-        # Run save_metadata synchronously in the Celery task
-        run_async(save_metadata())
-    except Exception as e:
-        logger.error(
-            f"Metadata extraction failed for file_id: {file_id}, error: {str(e)}"
-        )
-        raise
+def flush_download_counts() -> None:
+    """Write the download counts collected in Redis to the database."""
+    run_async(flush_download_counts_async())
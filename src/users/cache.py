@@ -0,0 +1,86 @@
+import json
+import logging
+from datetime import datetime
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from src.cache import CacheStats, TTLCache
+from src.config import settings
+from src.redis import get_redis
+from src.users.constants import USER_CACHE_KEY_PREFIX, Role
+
+logger = logging.getLogger(__name__)
+
+_local_users = TTLCache(
+    "users", maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+_redis_stats = CacheStats("users.redis")
+
+
+async def get_cached_user(user_id: str) -> dict | None:
+    """
+    Return a copy of a cached user row, looking in this process first and then
+    in Redis when USER_CACHE_REDIS is enabled.
+    """
+    user = _local_users.get(user_id)
+    if user is None and settings.USER_CACHE_REDIS:
+        user = await _get_from_redis(user_id)
+        if user is not None:
+            _local_users.set(user_id, user)
+    return dict(user) if user is not None else None
+
+
+async def cache_user(user: dict) -> None:
+    """Cache a user row without its password hash."""
+    user = {key: value for key, value in user.items() if key != "hashed_password"}
+    user_id = str(user["id"])
+    _local_users.set(user_id, user)
+    if not settings.USER_CACHE_REDIS:
+        return
+
+    try:
+        await get_redis().set(
+            f"{USER_CACHE_KEY_PREFIX}{user_id}",
+            json.dumps(user, default=str),
+            ex=settings.USER_CACHE_TTL_SECONDS,
+        )
+    except RedisError as e:
+        logger.warning(f"Could not cache user {user_id} in Redis: {e}")
+
+
+async def invalidate_user(user_id: UUID | str) -> None:
+    """
+    Drop a user from this process and from Redis. Other processes keep their
+    copy for at most USER_CACHE_TTL_SECONDS.
+    """
+    user_id = str(user_id)
+    _local_users.delete(user_id)
+    if not settings.USER_CACHE_REDIS:
+        return
+
+    try:
+        await get_redis().delete(f"{USER_CACHE_KEY_PREFIX}{user_id}")
+    except RedisError as e:
+        logger.warning(f"Could not invalidate user {user_id} in Redis: {e}")
+
+
+async def _get_from_redis(user_id: str) -> dict | None:
+    try:
+        cached = await get_redis().get(f"{USER_CACHE_KEY_PREFIX}{user_id}")
+    except RedisError as e:
+        logger.warning(f"Could not read user {user_id} from Redis: {e}")
+        return None
+
+    if cached is None:
+        _redis_stats.misses += 1
+        return None
+
+    _redis_stats.hits += 1
+    user = json.loads(cached)
+    user["id"] = UUID(user["id"])
+    user["department_id"] = UUID(user["department_id"])
+    user["role"] = Role(user["role"])
+    user["created_at"] = datetime.fromisoformat(user["created_at"])
+    user["updated_at"] = datetime.fromisoformat(user["updated_at"])
+    return user
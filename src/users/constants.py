@@ -5,3 +5,10 @@ class Role(str, Enum):
     USER = "USER"
     MANAGER = "MANAGER"
     ADMIN = "ADMIN"
+
+
+USER_CACHE_KEY_PREFIX = "users:"
+
+# Each row costs a bcrypt hash (~0.4 s per core) inside the import request
+USER_IMPORT_MAX_ROWS = 100
+USER_IMPORT_CSV_COLUMNS = ("username", "email", "password", "role", "department_id")
@@ -19,3 +19,11 @@ class DepartmentNotFound(NotFound):
 
 class NoPermissionForDepartment(PermissionDenied):
     DETAIL = "No permission for this department"
+
+
+class TooManyUsers(BadRequest):
+    DETAIL = "Too many users in one import"
+
+
+class InvalidImportFile(BadRequest):
+    DETAIL = "Invalid CSV file"
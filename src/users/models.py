@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Boolean, Column, ForeignKey, String
+from sqlalchemy import Boolean, Column, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import Enum as SQLEnum
@@ -34,3 +34,5 @@ class User(Base):
     department = relationship("Department", back_populates="users")
 
     files = relationship("File", back_populates="owner")
+
+    __table_args__ = (Index("users_created_at_id_idx", "created_at", "id"),)
@@ -1,11 +1,26 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, File, Query, UploadFile
 
 from src.auth.dependencies import get_current_user, require_role
+from src.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.schemas import Page
 from src.users.constants import Role
-from src.users.schemas import UserCreate, UserResponse, UserUpdateRole
-from src.users.service import create_user, get_user, get_users, update_user_role
+from src.users.schemas import (
+    UserCreate,
+    UserImportRequest,
+    UserImportResult,
+    UserResponse,
+    UserUpdateRole,
+)
+from src.users.service import (
+    create_user,
+    get_user,
+    get_users,
+    import_users,
+    update_user_role,
+)
+from src.users.utils import parse_users_csv
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -23,9 +38,42 @@ async def create_new_user(
     return UserResponse(**created_user)
 
 
+@router.post(
+    "/bulk",
+    response_model=list[UserImportResult],
+    dependencies=[Depends(require_role([Role.MANAGER, Role.ADMIN]))],
+)
+async def import_users_endpoint(
+    import_request: UserImportRequest, current_user: dict = Depends(get_current_user)
+):
+    """
+    Create many users from a JSON list and report the outcome of each row.
+    Managers can only create users in their own department.
+    """
+    results = await import_users(import_request.users, current_user)
+    return [UserImportResult(**result) for result in results]
+
+
+@router.post(
+    "/bulk/csv",
+    response_model=list[UserImportResult],
+    dependencies=[Depends(require_role([Role.MANAGER, Role.ADMIN]))],
+)
+async def import_users_csv_endpoint(
+    file: UploadFile = File(...), current_user: dict = Depends(get_current_user)
+):
+    """
+    Create many users from a CSV with the columns username, email, password,
+    department_id and optionally role, and report the outcome of each row.
+    """
+    rows = parse_users_csv(await file.read())
+    results = await import_users(rows, current_user)
+    return [UserImportResult(**result) for result in results]
+
+
 @router.get(
     "/",
-    response_model=list[UserResponse],
+    response_model=Page[UserResponse],
     dependencies=[Depends(require_role([Role.MANAGER, Role.ADMIN]))],
 )
 async def list_users(
@@ -34,14 +82,19 @@ async def list_users(
         description="Optional department ID to filter users\
          (admins only for other departments)",
     ),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: dict = Depends(get_current_user),
 ):
     """
-    List users in a department. Admins can list all or
+    List users in a department, newest first. Admins can list all or
     by department; managers only their own.
     """
-    users = await get_users(department_id, current_user)
-    return [UserResponse(**u) for u in users]
+    page = await get_users(department_id, current_user, cursor, limit)
+    return Page[UserResponse](
+        items=[UserResponse(**u) for u in page["items"]],
+        next_cursor=page["next_cursor"],
+    )
 
 
 @router.get(
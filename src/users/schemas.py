@@ -1,3 +1,4 @@
+from typing import Any
 from uuid import UUID
 
 from pydantic import EmailStr, Field
@@ -33,3 +34,14 @@ class UserResponse(CustomModel):
     role: Role
     department_id: UUID
     is_active: bool
+
+
+class UserImportRequest(CustomModel):
+    users: list[dict[str, Any]] = Field(..., min_length=1)
+
+
+class UserImportResult(CustomModel):
+    row: int
+    username: str | None = None
+    user: UserResponse | None = None
+    error: str | None = None
@@ -1,13 +1,20 @@
 from uuid import UUID
 
+from pydantic import ValidationError
 from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from src.auth.utils import hash_passwords_async
+from src.constants import DEFAULT_PAGE_SIZE
 from src.database import execute, fetch_all, fetch_one
-from src.users.constants import Role
+from src.pagination import build_page, paginate
+from src.users.cache import cache_user, get_cached_user, invalidate_user
+from src.users.constants import USER_IMPORT_MAX_ROWS, Role
 from src.users.exceptions import (
     DepartmentNotFound,
     InvalidRole,
     NoPermissionForDepartment,
+    TooManyUsers,
     UserAlreadyExists,
     UserNotFound,
 )
@@ -28,6 +35,16 @@ async def get_user_by_id(user_id: str) -> dict | None:
     return await fetch_one(query)
 
 
+async def get_active_user_by_id(user_id: str) -> dict | None:
+    """Retrieve a user by ID through the user cache, for authentication."""
+    user = await get_cached_user(user_id)
+    if user is None:
+        user = await get_user_by_id(user_id)
+        if user:
+            await cache_user(user)
+    return user
+
+
 async def create_user(user_create: UserCreate, current_user: dict) -> dict:
     """Create a new user with permission checks."""
     role = Role(current_user["role"])
@@ -45,15 +62,116 @@ async def create_user(user_create: UserCreate, current_user: dict) -> dict:
         raise DepartmentNotFound()
 
     user_data = user_create.model_dump()
-    user_data = prepare_user_for_creation(user_data)
+    user_data = await prepare_user_for_creation(user_data)
     insert_query = User.__table__.insert().values(**user_data)
     await execute(insert_query, commit_after=True)
 
     return await get_user_by_username(user_create.username)
 
 
-async def get_users(department_id: UUID | None, current_user: dict) -> list[dict]:
-    """Get list of users with permission checks."""
+async def import_users(rows: list[dict], current_user: dict) -> list[dict]:
+    """
+    Create many users with the permission rules of create_user and report the
+    outcome of each row. Departments and taken usernames or emails are looked
+    up with one query each, passwords are hashed in parallel and the users are
+    inserted with one multi-row INSERT.
+    """
+    if len(rows) > USER_IMPORT_MAX_ROWS:
+        raise TooManyUsers()
+
+    role = Role(current_user["role"])
+    results = []
+    candidates = []
+    for row_number, row in enumerate(rows, start=1):
+        result = {"row": row_number, "username": row.get("username"), "user": None}
+        results.append(result)
+        try:
+            user_create = UserCreate.model_validate(row)
+        except ValidationError as e:
+            result["error"] = format_validation_error(e)
+            continue
+        if role == Role.MANAGER and user_create.department_id != UUID(
+            current_user["department_id"]
+        ):
+            result["error"] = NoPermissionForDepartment.DETAIL
+            continue
+        candidates.append((result, user_create))
+
+    if not candidates:
+        return results
+
+    departments = await fetch_all(
+        select(Department.id).where(
+            Department.id.in_({user.department_id for _, user in candidates})
+        )
+    )
+    department_ids = {department["id"] for department in departments}
+    taken = await fetch_all(
+        select(User.username, User.email).where(
+            User.username.in_({user.username for _, user in candidates})
+            | User.email.in_({user.email for _, user in candidates})
+        )
+    )
+    taken_usernames = {user["username"] for user in taken}
+    taken_emails = {user["email"] for user in taken}
+
+    accepted = []
+    for result, user_create in candidates:
+        if user_create.department_id not in department_ids:
+            result["error"] = DepartmentNotFound.DETAIL
+        elif (
+            user_create.username in taken_usernames or user_create.email in taken_emails
+        ):
+            result["error"] = UserAlreadyExists.DETAIL
+        else:
+            # Later rows with the same username or email are duplicates
+            taken_usernames.add(user_create.username)
+            taken_emails.add(user_create.email)
+            accepted.append((result, user_create))
+
+    if not accepted:
+        return results
+
+    hashed_passwords = await hash_passwords_async(
+        [user_create.password for _, user_create in accepted]
+    )
+    user_rows = [
+        {
+            **user_create.model_dump(exclude={"password"}),
+            "hashed_password": hashed_password,
+        }
+        for (_, user_create), hashed_password in zip(accepted, hashed_passwords)
+    ]
+    # Users created since the lookup above are skipped by the conflict clause
+    inserted = await fetch_all(
+        pg_insert(User)
+        .values(user_rows)
+        .on_conflict_do_nothing()
+        .returning(User.__table__),
+        commit_after=True,
+    )
+    inserted_by_username = {user["username"]: user for user in inserted}
+    for result, user_create in accepted:
+        result["user"] = inserted_by_username.get(user_create.username)
+        if result["user"] is None:
+            result["error"] = UserAlreadyExists.DETAIL
+    return results
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+async def get_users(
+    department_id: UUID | None,
+    current_user: dict,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """Get a page of users with permission checks."""
     role = Role(current_user["role"])
     if role == Role.ADMIN:
         query = select(User).where(User.is_active)
@@ -70,7 +188,8 @@ async def get_users(department_id: UUID | None, current_user: dict) -> list[dict
     if department_id and role == Role.ADMIN:
         query = query.where(User.department_id == department_id)
 
-    return await fetch_all(query)
+    query = paginate(query, User.created_at, User.id, cursor, limit)
+    return build_page(await fetch_all(query), limit)
 
 
 async def get_user(user_id: UUID, current_user: dict) -> dict:
@@ -96,5 +215,6 @@ async def update_user_role(
 
     update_query = update(User).where(User.id == user_id).values(role=update_data.role)
     await execute(update_query, commit_after=True)
+    await invalidate_user(user_id)
 
     return await get_user_by_id(str(user_id))
@@ -1,7 +1,32 @@
-from src.auth.utils import hash_password
+import csv
+import io
 
+from src.auth.utils import hash_password_async
+from src.users.constants import USER_IMPORT_CSV_COLUMNS
+from src.users.exceptions import InvalidImportFile
 
-def prepare_user_for_creation(user_data: dict) -> dict:
+
+async def prepare_user_for_creation(user_data: dict) -> dict:
     """Prepare user data for creation by hashing the password."""
-    user_data["hashed_password"] = hash_password(user_data.pop("password"))
+    user_data["hashed_password"] = await hash_password_async(user_data.pop("password"))
     return user_data
+
+
+def parse_users_csv(content: bytes) -> list[dict]:
+    """
+    Parse a CSV of users with a header row. Empty cells are dropped so that
+    defaults such as the USER role apply.
+    """
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+        missing = set(USER_IMPORT_CSV_COLUMNS) - {"role"} - set(reader.fieldnames or ())
+        if missing:
+            raise InvalidImportFile(
+                detail=f"Missing CSV columns: {', '.join(sorted(missing))}"
+            )
+        return [
+            {key: value for key, value in row.items() if key and value}
+            for row in reader
+        ]
+    except (UnicodeDecodeError, csv.Error):
+        raise InvalidImportFile()
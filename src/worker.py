@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, TypeVar
+
+from src.database import engine
+from src.files.s3 import close_s3_client, open_s3_client
+from src.redis import close_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_pid: int | None = None
+_loop_lock = threading.Lock()
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the event loop of this worker process, starting it on first use.
+
+    The loop runs forever in a daemon thread and owns the process's database
+    pool, S3 client and Redis client, so they are created once and reused by
+    every task. A forked child starts its own loop.
+    """
+    global _loop, _loop_thread, _loop_pid
+    with _loop_lock:
+        if _loop is not None and _loop_pid == os.getpid():
+            return _loop
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(
+            target=loop.run_forever, name="worker-event-loop", daemon=True
+        )
+        thread.start()
+        asyncio.run_coroutine_threadsafe(open_s3_client(), loop).result()
+        _loop, _loop_thread, _loop_pid = loop, thread, os.getpid()
+        logger.info(f"Started worker event loop in process {_loop_pid}")
+        return loop
+
+
+def submit(coroutine: Coroutine[None, None, T]) -> Future[T]:
+    """Schedule a coroutine on the worker loop without waiting for it."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_worker_loop())
+
+
+def run_on_worker_loop(coroutine: Coroutine[None, None, T]) -> T:
+    """Run a coroutine on the worker loop and wait for its result."""
+    return submit(coroutine).result()
+
+
+def stop_worker_loop() -> None:
+    """Close the clients of the worker loop and stop it."""
+    global _loop, _loop_thread, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            return
+
+        loop, thread = _loop, _loop_thread
+        _loop, _loop_thread, _loop_pid = None, None, None
+
+    asyncio.run_coroutine_threadsafe(_close_clients(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+async def _close_clients() -> None:
+    await close_s3_client()
+    await close_redis()
+    await engine.dispose()
@@ -0,0 +1,29 @@
+import uuid
+
+import pytest
+
+from src.files.models import File, UploadSession
+from src.files.service import build_s3_key
+
+USER = {"id": uuid.uuid4()}
+MAX_LENGTH = min(
+    File.__table__.c.s3_key.type.length, UploadSession.__table__.c.s3_key.type.length
+)
+
+
+@pytest.mark.parametrize("length", [179, 180, 200])
+def test_build_s3_key_fits_the_s3_key_columns(length):
+    filename = "r" * (length - len(".docx")) + ".docx"
+
+    s3_key = build_s3_key(USER, filename)
+
+    assert len(s3_key) <= MAX_LENGTH
+    assert s3_key.endswith(".docx")
+    assert s3_key.startswith(f"files/{USER['id']}/")
+
+
+def test_build_s3_key_keeps_a_filename_that_fits():
+    filename = "r" * 174 + ".docx"
+
+    assert build_s3_key(USER, filename).endswith(f"/{filename}")
+    assert len(build_s3_key(USER, filename)) == MAX_LENGTH
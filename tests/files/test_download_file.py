@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.files import service
+from src.files.constants import Visibility
+
+FILE = {
+    "id": uuid.uuid4(),
+    "filename": "report.pdf",
+    "visibility": Visibility.PUBLIC,
+    "etag": '"d41d8cd98f00b204e9800998ecf8427e"',
+    "created_at": datetime(2024, 6, 1),
+    "file_size": 1024,
+    "s3_key": "files/report.pdf",
+}
+USER = {"id": uuid.uuid4(), "role": "USER", "department_id": str(uuid.uuid4())}
+
+
+@pytest.fixture
+def stream(monkeypatch) -> dict:
+    """Serve FILE to USER from a fake S3 stream that records being closed."""
+    stream = {"closed": False}
+
+    async def get_cached_file(file_id, load):
+        return dict(FILE)
+
+    async def can_access_file(file, current_user):
+        return True
+
+    async def stream_from_s3(s3_key, byte_range, if_range, if_none_match=None):
+        async def close():
+            stream["closed"] = True
+
+        return {
+            "body": None,
+            "close": close,
+            "content_length": FILE["file_size"],
+            "content_range": None,
+            "etag": FILE["etag"],
+        }
+
+    monkeypatch.setattr(service.settings, "DOWNLOAD_REDIRECT_MIN_SIZE", None)
+    monkeypatch.setattr(service, "get_cached_file", get_cached_file)
+    monkeypatch.setattr(service, "can_access_file", can_access_file)
+    monkeypatch.setattr(service, "stream_from_s3", stream_from_s3)
+    return stream
+
+
+def test_download_file_closes_the_stream_when_counting_fails(stream, monkeypatch):
+    async def record_download(file):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(service, "record_download", record_download)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.download_file(FILE["id"], USER))
+    assert stream["closed"]
+
+
+def test_download_file_closes_the_stream_when_recording_its_etag_fails(
+    stream, monkeypatch
+):
+    async def record_etag(s3_key, etag):
+        raise ConnectionError("The database is down")
+
+    async def get_cached_file(file_id, load):
+        return {**FILE, "etag": None}
+
+    monkeypatch.setattr(service, "record_etag", record_etag)
+    monkeypatch.setattr(service, "get_cached_file", get_cached_file)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(
+            service.download_file(FILE["id"], USER, range_header="bytes=100-199")
+        )
+    assert stream["closed"]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import uuid
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from src.files import extraction, metadata
+from src.files.constants import EXTRACTION_QUEUE_FAILED_KEY, EXTRACTION_QUEUE_KEY
+from src.files.exceptions import FileNotFound
+
+SNAPSHOT = "files:extraction_queue:draining:0:test"
+
+
+class FakeRedis:
+    """The list commands of the drain, on in-memory lists."""
+
+    def __init__(self, lists: dict[str, list[str]]):
+        self.lists = lists
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start : None if end == -1 else end + 1]
+
+    async def ltrim(self, key, start, end):
+        self.lists[key] = await self.lrange(key, start, end)
+
+    async def delete(self, key):
+        self.lists.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    def rpush(self, key, *values):
+        self.commands.append(
+            lambda: self.redis.lists.setdefault(key, []).extend(values)
+        )
+
+    def delete(self, key):
+        self.commands.append(lambda: self.redis.lists.pop(key, None))
+
+    async def execute(self):
+        for command in self.commands:
+            command()
+
+
+def job(s3_key: str) -> list[str]:
+    return [str(uuid.uuid4()), s3_key, "PDF"]
+
+
+def test_drain_requeues_transient_failures_and_dead_letters_the_rest(monkeypatch):
+    saved = job("files/saved.pdf")
+    unreachable = job("files/unreachable.pdf")
+    throttled = job("files/throttled.pdf")
+    missing = job("files/missing.pdf")
+    errors = {
+        unreachable[1]: EndpointConnectionError(endpoint_url="http://s3"),
+        throttled[1]: ClientError(
+            {"Error": {"Code": "SlowDown"}, "ResponseMetadata": {}}, "GetObject"
+        ),
+        missing[1]: FileNotFound(),
+    }
+    redis = FakeRedis(
+        {SNAPSHOT: [json.dumps(j) for j in (saved, unreachable, throttled, missing)]}
+    )
+    batches = []
+
+    async def read_file_metadata(file_id, s3_key, file_type):
+        if s3_key in errors:
+            raise errors[s3_key]
+        return {"page_count": 1}
+
+    async def save_metadata_batch(extracted):
+        batches.append(list(extracted))
+        return len(extracted)
+
+    monkeypatch.setattr(metadata, "read_file_metadata", read_file_metadata)
+    monkeypatch.setattr(metadata, "save_metadata_batch", save_metadata_batch)
+    monkeypatch.setattr(extraction, "get_redis", lambda: redis)
+
+    assert asyncio.run(extraction.drain_snapshot(SNAPSHOT)) == 1
+
+    # The batch is saved once, without the files that failed
+    assert batches == [[saved[0]]]
+    assert redis.lists[EXTRACTION_QUEUE_KEY] == [
+        json.dumps(unreachable),
+        json.dumps(throttled),
+    ]
+    assert redis.lists[EXTRACTION_QUEUE_FAILED_KEY] == [json.dumps(missing)]
+    assert SNAPSHOT not in redis.lists
@@ -0,0 +1,50 @@
+import uuid
+from datetime import datetime
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from src.files.constants import FileType, Visibility
+from src.files.schemas import FileResponse
+from src.files.utils import build_file_page_content
+from src.schemas import Page
+
+
+def make_file(file_metadata: dict | None) -> dict:
+    """A listing row as list_files returns it, with the columns FileResponse drops."""
+    file_id, created_at = uuid.uuid4(), datetime(2024, 6, 1, 12, 30, 15, 123456)
+    return {
+        "id": file_id,
+        "owner_id": uuid.uuid4(),
+        "department_id": uuid.uuid4(),
+        "filename": "quarterly report №1.pdf",
+        "file_type": FileType.PDF,
+        "visibility": Visibility.DEPARTMENT,
+        "file_size": 1_048_576,
+        "s3_key": f"files/{file_id}.pdf",
+        "etag": "d41d8cd98f00b204e9800998ecf8427e",
+        "blob_id": None,
+        "download_count": 3,
+        "deleted_at": None,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "file_metadata": file_metadata,
+    }
+
+
+def test_build_file_page_content_matches_the_response_model():
+    metadata = {
+        "id": uuid.uuid4(),
+        "file_id": uuid.uuid4(),
+        "page_count": 12,
+        "title": "Quarterly report",
+        "creation_date": "D:20240601123015",
+    }
+    page = {
+        "items": [make_file(metadata), make_file({}), make_file(None)],
+        "next_cursor": "MjAyNC0wNi0wMVQxMjozMDoxNQ",
+    }
+
+    content = orjson.loads(ORJSONResponse(build_file_page_content(page)).body)
+
+    assert content == Page[FileResponse].model_validate(page).model_dump(mode="json")
@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Select
+
+from src.files import service
+from src.files.constants import METADATA_PREFIX, FileType, Visibility
+from src.users.constants import Role
+
+DEPARTMENT_ID = uuid.uuid4()
+USERS = [
+    {"id": uuid.uuid4(), "role": role.value, "department_id": str(DEPARTMENT_ID)}
+    for role in Role
+]
+
+
+def make_rows(query: Select, count: int) -> list[dict]:
+    """Rows shaped like the result of `query`, each file with its metadata."""
+    created_at = datetime(2024, 6, 1)
+    rows = []
+    for i in range(count):
+        row = {column.key: None for column in query.selected_columns}
+        row.update(
+            id=uuid.uuid4(),
+            owner_id=uuid.uuid4(),
+            department_id=DEPARTMENT_ID,
+            file_type=FileType.PDF,
+            visibility=Visibility.PUBLIC,
+            download_count=0,
+            created_at=created_at - timedelta(seconds=i),
+            updated_at=created_at,
+        )
+        row[f"{METADATA_PREFIX}id"] = uuid.uuid4()
+        row[f"{METADATA_PREFIX}file_id"] = row["id"]
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def statements(monkeypatch) -> list:
+    """Record every statement list_files runs, answering with full pages."""
+    statements = []
+
+    async def fetch_all(query, connection=None, commit_after=False):
+        statements.append(query)
+        return make_rows(query, query._limit)
+
+    async def fetch_one(query, connection=None, commit_after=False):
+        statements.append(query)
+        return make_rows(query, 1)[0]
+
+    async def execute(query, connection=None, commit_after=False):
+        statements.append(query)
+
+    async def get_pending_downloads(file_ids):
+        return {}
+
+    monkeypatch.setattr(service.settings, "FILE_CACHE_ENABLED", False)
+    monkeypatch.setattr(service, "fetch_all", fetch_all)
+    monkeypatch.setattr(service, "fetch_one", fetch_one)
+    monkeypatch.setattr(service, "execute", execute)
+    monkeypatch.setattr(service, "get_pending_downloads", get_pending_downloads)
+    return statements
+
+
+@pytest.mark.parametrize("user", USERS, ids=lambda user: user["role"])
+def test_list_files_query_count_is_independent_of_page_size(statements, user):
+    counts = {}
+    for limit in (1, 10, 100):
+        statements.clear()
+        page = asyncio.run(service.list_files(None, user, limit=limit))
+
+        assert len(page["items"]) == limit
+        assert all(item["file_metadata"] for item in page["items"])
+        counts[limit] = len(statements)
+
+    assert counts == {1: 1, 10: 1, 100: 1}
+    assert "LEFT OUTER JOIN file_metadata" in str(statements[0])
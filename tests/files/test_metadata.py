@@ -0,0 +1,117 @@
+import io
+import uuid
+
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+from src.files import metadata
+from src.files.metadata import build_metadata_row
+
+IMAGE_SIZE = 200_000
+
+
+class CountingStream(io.BytesIO):
+    """Stands in for S3RangeReader, counting the bytes the parser reads."""
+
+    bytes_fetched = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_fetched += len(data)
+        return data
+
+
+def xobject(data: bytes, **entries) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    stream[NameObject("/Type")] = NameObject("/XObject")
+    for key, value in entries.items():
+        stream[NameObject(f"/{key}")] = value
+    return stream
+
+
+def scan_and_form_pdf() -> bytes:
+    """A scanned page drawing an image, and a page whose text is in a form."""
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    image = xobject(
+        bytes(IMAGE_SIZE),
+        Subtype=NameObject("/Image"),
+        Width=NumberObject(400),
+        Height=NumberObject(500),
+        ColorSpace=NameObject("/DeviceGray"),
+        BitsPerComponent=NumberObject(8),
+    )
+    form = xobject(
+        b"BT /F1 12 Tf 10 100 Td (drawn in a form) Tj ET",
+        Subtype=NameObject("/Form"),
+        BBox=ArrayObject([NumberObject(n) for n in (0, 0, 200, 200)]),
+        Resources=DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        ),
+    )
+    for name, drawn in (("/Im0", image), ("/Fm0", form)):
+        page = PageObject.create_blank_page(None, 200, 200)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/XObject"): DictionaryObject(
+                    {NameObject(name): writer._add_object(drawn)}
+                )
+            }
+        )
+        contents = DecodedStreamObject()
+        contents.set_data(b"q " + name.encode() + b" Do Q")
+        page[NameObject("/Contents")] = writer._add_object(contents)
+        writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_build_metadata_row_fits_strings_to_their_columns():
+    row = build_metadata_row(
+        uuid.uuid4(),
+        {
+            "page_count": 3,
+            "title": "Quarterly\x00 report" + "x" * 300,
+            "author": "Finance\x00",
+            "creation_date": "D:20240601123015" * 5,
+            "content_text": "text\x00",
+        },
+    )
+
+    assert row["title"] == ("Quarterly report" + "x" * 300)[:255]
+    assert row["author"] == "Finance"
+    assert len(row["creation_date"]) == 50
+    assert row["creator"] is None
+    assert row["page_count"] == 3
+    assert row["content_text"] == "text"
+
+
+def test_range_read_pdf_skips_scans_but_not_forms(monkeypatch):
+    monkeypatch.setattr(metadata, "S3RangeReader", CountingStream)
+    stream = CountingStream(scan_and_form_pdf())
+
+    parsed = metadata.parse_pdf_metadata(stream)
+
+    assert parsed["page_count"] == 2
+    assert parsed["content_text"] == "drawn in a form"
+    assert stream.bytes_fetched < IMAGE_SIZE
+
+
+def test_downloaded_pdf_reads_text_of_every_page():
+    parsed = metadata.parse_pdf_metadata(io.BytesIO(scan_and_form_pdf()))
+
+    assert parsed["content_text"] == "drawn in a form"
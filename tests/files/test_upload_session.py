@@ -0,0 +1,61 @@
+import asyncio
+import uuid
+
+import pytest
+
+from src.files import service
+from src.files.constants import Visibility
+from src.files.models import UploadSession
+
+USER = {"id": uuid.uuid4(), "role": "ADMIN", "department_id": uuid.uuid4()}
+
+
+class InsertFailed(Exception):
+    pass
+
+
+@pytest.fixture
+def multipart(monkeypatch) -> dict:
+    """Fake S3 multipart calls and a session insert that fails."""
+    multipart = {"s3_key": None, "aborted": False}
+
+    async def create_multipart_upload(s3_key):
+        multipart["s3_key"] = s3_key
+        return "upload-id"
+
+    async def abort_multipart_upload(s3_key, upload_id):
+        multipart["aborted"] = True
+
+    async def fetch_one(query, connection=None, commit_after=False):
+        raise InsertFailed()
+
+    monkeypatch.setattr(service, "create_multipart_upload", create_multipart_upload)
+    monkeypatch.setattr(service, "abort_multipart_upload", abort_multipart_upload)
+    monkeypatch.setattr(service, "fetch_one", fetch_one)
+    return multipart
+
+
+def test_create_upload_session_aborts_the_upload_when_the_insert_fails(multipart):
+    filename = "r" * 195 + ".docx"
+
+    with pytest.raises(InsertFailed):
+        asyncio.run(
+            service.create_upload_session(filename, 1024, Visibility.PUBLIC, USER)
+        )
+
+    assert multipart["aborted"]
+    assert len(multipart["s3_key"]) <= UploadSession.__table__.c.s3_key.type.length
+
+
+def test_create_upload_session_keeps_the_insert_error_if_the_abort_fails(
+    multipart, monkeypatch
+):
+    async def abort_multipart_upload(s3_key, upload_id):
+        raise ConnectionError("S3 is down")
+
+    monkeypatch.setattr(service, "abort_multipart_upload", abort_multipart_upload)
+
+    with pytest.raises(InsertFailed):
+        asyncio.run(
+            service.create_upload_session("r.docx", 1024, Visibility.PUBLIC, USER)
+        )
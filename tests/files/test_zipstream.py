@@ -0,0 +1,72 @@
+import asyncio
+import io
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator
+
+from src.files.zipstream import ZipEntry, stream_zip
+
+
+async def chunks_of(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def build_zip(entries: list[ZipEntry]) -> bytes:
+    async def entry_stream() -> AsyncIterator[ZipEntry]:
+        for entry in entries:
+            yield entry
+
+    async def collect() -> bytes:
+        return b"".join([chunk async for chunk in stream_zip(entry_stream())])
+
+    return asyncio.run(collect())
+
+
+def test_stream_zip_writes_a_readable_archive():
+    modified = datetime(2024, 6, 1, 12, 30, 16)
+    archive = zipfile.ZipFile(
+        io.BytesIO(
+            build_zip(
+                [
+                    ZipEntry("report.pdf", 10, modified, chunks_of(b"hello", b"world")),
+                    ZipEntry("отчёт.docx", 0, datetime(1970, 1, 1), chunks_of()),
+                ]
+            )
+        )
+    )
+
+    assert archive.testzip() is None
+    assert archive.namelist() == ["report.pdf", "отчёт.docx"]
+    assert archive.read("report.pdf") == b"helloworld"
+    assert archive.getinfo("report.pdf").date_time == (2024, 6, 1, 12, 30, 16)
+    assert archive.getinfo("report.pdf").compress_type == zipfile.ZIP_STORED
+    # Sizes and CRCs follow the content in data descriptors
+    assert archive.getinfo("report.pdf").flag_bits & 0x08
+    assert archive.getinfo("отчёт.docx").date_time == (1980, 1, 1, 0, 0, 0)
+
+
+def test_stream_zip_uses_zip64_past_65535_entries():
+    count = 0x10000 + 5
+    modified = datetime(2024, 6, 1)
+    data = build_zip(
+        [ZipEntry(f"{i}.txt", 1, modified, chunks_of(b"x")) for i in range(count)]
+    )
+    archive = zipfile.ZipFile(io.BytesIO(data))
+
+    assert len(archive.infolist()) == count
+    assert archive.read(f"{count - 1}.txt") == b"x"
+    # zip64 end of central directory record
+    assert b"PK\x06\x06" in data[-200:]
+
+
+def test_stream_zip_writes_zip64_records_for_large_entries():
+    # The layout is chosen from the expected size, as for a file over 4 GiB
+    data = build_zip(
+        [ZipEntry("large.pdf", 0x1_0000_0000, datetime(2024, 6, 1), chunks_of(b"x"))]
+    )
+    archive = zipfile.ZipFile(io.BytesIO(data))
+
+    assert archive.read("large.pdf") == b"x"
+    # zip64 extra field of the local header
+    assert data[30 + len("large.pdf") : 30 + len("large.pdf") + 2] == b"\x01\x00"